@@ -0,0 +1,137 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from odev.common.connectors.rpc import RpcConnector
+from odev.common.databases.remote import RemoteDatabase
+from odev.common.logging import logging
+
+from odev.plugins.odev_rolling_release.api.services.service_abstract import join_cache_refreshes
+from odev.plugins.odev_rolling_release.datastore.session import RRSessionStore
+
+
+try:
+    import httpx
+    from odoolib import tools as odoolib_tools
+except ImportError:
+    httpx = odoolib_tools = None
+
+
+logger = logging.getLogger(__name__)
+
+# (url, database name)
+Endpoint = Tuple[str, str]
+
+
+class _PooledHttpx:
+    # Stands for the httpx module used by odoolib, which calls httpx.post for
+    # every request: going through one client keeps connections alive by host.
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def post(self, *args, **kwargs):
+        if not kwargs.get("cookies"):
+            kwargs.pop("cookies", None)
+        return self._client.post(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        if not kwargs.get("cookies"):
+            kwargs.pop("cookies", None)
+        return self._client.get(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(httpx, name)
+
+
+class ConnectionManager:
+    # One RpcConnector by endpoint for the whole run, sharing a keep-alive pool.
+    # The user id of every connection is stored with an expiry so that the next
+    # runs skip the login call, odoolib only logs in when it has no user id.
+    # The key holds the login, and a failed run drops the ids it reused.
+
+    session_store: Optional[RRSessionStore]
+    session_ttl: int
+
+    def __init__(self, session_store: Optional[RRSessionStore] = None, session_ttl: int = 0, client: Any = None):
+        self.session_store = session_store
+        self.session_ttl = session_ttl
+        self._connectors: Dict[Endpoint, RpcConnector] = {}
+        self._lock = threading.Lock()
+        # an httpx.Client to use instead of the default one, e.g. with event hooks
+        self._custom_client = client
+        self._client: Any = None
+        self._odoolib_httpx: Any = None
+        self._restored: Dict[Endpoint, str] = {}
+
+    def __enter__(self) -> "ConnectionManager":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        self.close(failed=exc_type is not None)
+
+    def _session_key(self, endpoint: Endpoint, connection: Any) -> str:
+        # another login on the same endpoint has another user id
+        return "/".join([*endpoint, getattr(connection, "login", None) or ""])
+
+    def open(self) -> None:
+        if odoolib_tools is None:
+            logger.debug("httpx or odoolib cannot be imported, the connections are not pooled")
+            return
+        if self._client is not None:
+            return
+        self._client = self._custom_client or httpx.Client()
+        self._odoolib_httpx = odoolib_tools.httpx
+        odoolib_tools.httpx = _PooledHttpx(self._client)
+
+    def get(self, url: str, database: str) -> RpcConnector:
+        endpoint = (url, database)
+        with self._lock:
+            if endpoint not in self._connectors:
+                connector = RpcConnector(RemoteDatabase(url, database))
+                self._restore_session(endpoint, connector)
+                self._connectors[endpoint] = connector
+            return self._connectors[endpoint]
+
+    def _get_connection(self, connector: RpcConnector) -> Any:
+        connector.connect()
+        return connector.connection
+
+    def _restore_session(self, endpoint: Endpoint, connector: RpcConnector) -> None:
+        if not self.session_store or not self.session_ttl:
+            return
+        connection = self._get_connection(connector)
+        key = self._session_key(endpoint, connection)
+        if user_id := self.session_store.get(key):
+            logger.debug(f"Reusing session of user {user_id} on {endpoint[0]}")
+            connection.user_id = user_id
+            self._restored[endpoint] = key
+
+    def forget_sessions(self) -> None:
+        # the reused user ids may be the reason of the failure, e.g. a password changed since
+        if not self.session_store:
+            return
+        for key in self._restored.values():
+            self.session_store.delete(key)
+
+    def save_sessions(self) -> None:
+        if not self.session_store or not self.session_ttl:
+            return
+        for endpoint, connector in self._connectors.items():
+            connection = getattr(connector, "connection", None)
+            if user_id := getattr(connection, "user_id", None):
+                self.session_store.set(self._session_key(endpoint, connection), user_id, self.session_ttl)
+
+    def close(self, failed: bool = False) -> None:
+        join_cache_refreshes()
+        if failed:
+            self.forget_sessions()
+        else:
+            self.save_sessions()
+        self._connectors.clear()
+        self._restored.clear()
+        if self._client is None:
+            return
+        odoolib_tools.httpx = self._odoolib_httpx
+        self._client.close()
+        self._client = None
@@ -1,21 +1,40 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from odev.plugins.odev_rolling_release.api.dtos.Subscription import Subscription
-from odev.plugins.odev_rolling_release.api.dtos.UpgradeRequest import UpgradeRequest
-from odev.plugins.odev_rolling_release.utils.utils import BoolStr
+from odev.plugins.odev_rolling_release.api.dtos.fields import FieldRequirements
+from odev.plugins.odev_rolling_release.utils.utils import many2one_id
 
 
 class Database:
+    __slots__ = (
+        "id",
+        "version",
+        "db_name",
+        "db_uuid",
+        "url",
+        "parent_id",
+        "subscription_id",
+        "_date_valid",
+        "_date_valid_str",
+    )
+
     id: Optional[int]  # pylint: disable=W0622
     version: str
     db_name: str
     db_uuid: str
-    parent_id: bool
-    subscription: Subscription = Subscription()
+    url: str
+    parent_id: Any
     subscription_id: Optional[int]
-    upgrade_request: Optional[UpgradeRequest] = None
-    date_valid: Optional[datetime]
+
+    _required_fields: FieldRequirements = {
+        "db_name": None,
+        "version": None,
+        "parent_id": None,
+        "subscription_id": None,
+        "date_valid": None,
+        "db_uuid": "upgrade_mode",
+        "url": "bs4",
+    }
 
     def __init__(
         self,
@@ -23,7 +42,8 @@ class Database:
         version: str = "NO VERSION",
         db_name: str = "NO NAME",
         db_uuid: str = "",
-        parent_id: bool = False,
+        url: str = "",
+        parent_id: Any = False,
         subscription_id: Optional[int] = None,
         date_valid: Optional[str] = "",
         **kwargs,
@@ -32,12 +52,33 @@ class Database:
         self.version = version
         self.db_name = db_name
         self.db_uuid = db_uuid
-        self.parent_id = BoolStr(parent_id)
-        self.subscription_id = subscription_id
-        self.date_valid = datetime.strptime(date_valid, "%Y-%m-%d %H:%M:%S") if date_valid else None
+        self.url = url or ""
+        self.parent_id = parent_id
+        self.subscription_id = many2one_id(subscription_id)
+        self._date_valid = None
+        self._date_valid_str = date_valid or None
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Database":
+        database = cls.__new__(cls)
+        database.id = record.get("id")
+        database.version = record.get("version") or "NO VERSION"
+        database.db_name = record.get("db_name") or "NO NAME"
+        database.db_uuid = record.get("db_uuid") or ""
+        database.url = record.get("url") or ""
+        database.parent_id = record.get("parent_id", False)
+        database.subscription_id = many2one_id(record.get("subscription_id"))
+        database._date_valid = None
+        database._date_valid_str = record.get("date_valid") or None
+        return database
 
-    def get_date_valid(self) -> str:
-        return self.date_valid.strftime("%d-%m-%Y") if self.date_valid else ""
+    @property
+    def date_valid(self) -> Optional[datetime]:
+        # parsed on first access only, most rows never need it
+        if self._date_valid is None and self._date_valid_str:
+            self._date_valid = datetime.strptime(self._date_valid_str, "%Y-%m-%d %H:%M:%S")
+            self._date_valid_str = None
+        return self._date_valid
 
     def __repr__(self) -> str:
         return f"DatabaseDTO({self.id}, {self.db_name})"
@@ -1,19 +1,32 @@
 from typing import Optional
 
+from odev.plugins.odev_rolling_release.api.dtos.fields import FieldRequirements
 from odev.plugins.odev_rolling_release.utils.utils import BoolStr
 
 
 class Subscription:
+    __slots__ = ("id", "client_order_ref")
+
     id: Optional[int]  # pylint: disable=W0622
-    client_order_ref: BoolStr
+    client_order_ref: Optional[str]
+
+    _required_fields: FieldRequirements = {
+        "client_order_ref": "show_sub",
+    }
 
     def __init__(self, id: int = None, client_order_ref: Optional[str] = None, **kwargs):  # pylint: disable=W0622
         self.id = id
-        self.client_order_ref = BoolStr(client_order_ref)
+        self.client_order_ref = client_order_ref or None
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Subscription":
+        subscription = cls.__new__(cls)
+        subscription.id = record.get("id")
+        subscription.client_order_ref = record.get("client_order_ref") or None
+        return subscription
 
     def get_sub_value(self, show_sub: bool = False) -> str:
-        self.client_order_ref.value_if_true = show_sub
-        return str(self.client_order_ref)
+        return str(BoolStr(self.client_order_ref, show_sub))
 
     def __repr__(self) -> str:
         return f"SubscriptionDTO({self.id}, {self.get_sub_value(True)})"
@@ -1,23 +1,38 @@
-from typing import Any, List, Optional
+from typing import Optional
 
-from bs4 import BeautifulSoup
-
-from odev.plugins.odev_rolling_release.api.dtos.Database import Database
+from odev.plugins.odev_rolling_release.api.dtos.fields import FieldRequirements
+from odev.plugins.odev_rolling_release.utils.links import extract_link
 
 
 class Task:
+    __slots__ = (
+        "id",
+        "name",
+        "description",
+        "write_date",
+        "show_sub",
+        "upgrade_mode",
+        "_database_url",
+    )
+
     id: int  # pylint: disable=W0622
     name: str
-    show_sub: bool = False
-    upgrade_mode: bool = False
+    show_sub: bool
+    upgrade_mode: bool
     description: Optional[str]
-    database: Database = Database()
+    write_date: Optional[str]
+
+    _required_fields: FieldRequirements = {
+        "name": None,
+        "write_date": "bs4",
+    }
 
     def __init__(
         self,
         id: int,
         name: str,
         description: str = None,
+        write_date: Optional[str] = None,
         show_sub: bool = False,
         upgrade_mode: bool = False,
         **kwargs,
@@ -25,8 +40,22 @@ class Task:
         self.id = id
         self.name = name
         self.description = description
+        self.write_date = write_date
         self.show_sub = show_sub
         self.upgrade_mode = upgrade_mode
+        self._database_url = None
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Task":
+        task = cls.__new__(cls)
+        task.id = record["id"]
+        task.name = record.get("name") or ""
+        task.description = record.get("description") or None
+        task.write_date = record.get("write_date") or None
+        task.show_sub = record.get("show_sub", False)
+        task.upgrade_mode = record.get("upgrade_mode", False)
+        task._database_url = None
+        return task
 
     @property
     def display_name(self) -> str:
@@ -34,26 +63,13 @@ class Task:
 
     @property
     def database_url(self) -> str:
-        if not self.description:
-            return ""
-        url = BeautifulSoup(self.description, "html.parser").find("a", href=True)
-        return url["href"].replace("/_odoo/support", "")
-
-    def task_link(self, odoo_url: str = "") -> str:
-        return f"{odoo_url}/odoo/my-tasks/{self.id}"
-
-    def get_clean_row(self, odoo_url: str = "") -> List[Any]:
-        rows = [
-            self.name,
-            self.database.version,
-            str(self.database.subscription.get_sub_value(self.show_sub)),
-            str(self.database.parent_id),
-            self.database.get_date_valid(),
-            self.task_link(odoo_url),
-        ]
-        if self.upgrade_mode:
-            rows.insert(4, str(self.database.upgrade_request.has_traceback))
-        return rows
+        if self._database_url is None:
+            self.database_url = extract_link(self.description)
+        return self._database_url
+
+    @database_url.setter
+    def database_url(self, url: str) -> None:
+        self._database_url = url.replace("/_odoo/support", "").rstrip("/")
 
     def __repr__(self) -> str:
         return f"TaskDTO({self.id}, {self.name})"
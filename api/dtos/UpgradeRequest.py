@@ -1,12 +1,19 @@
 from typing import Optional
 
-from odev.plugins.odev_rolling_release.utils.utils import BoolStr
+from odev.plugins.odev_rolling_release.api.dtos.fields import FieldRequirements
 
 
 class UpgradeRequest:
+    __slots__ = ("id", "db_uuid", "last_traceback")
+
     id: Optional[int]  # pylint: disable=W0622
     db_uuid: str
-    last_traceback: Optional[str] = None
+    last_traceback: Optional[str]
+
+    _required_fields: FieldRequirements = {
+        "db_uuid": None,
+        "last_traceback": None,
+    }
 
     def __init__(
         self, id: int = None, db_uuid: str = "", last_traceback: Optional[str] = None, **kwargs  # pylint: disable=W0622
@@ -15,9 +22,13 @@ class UpgradeRequest:
         self.db_uuid = db_uuid
         self.last_traceback = last_traceback
 
-    @property
-    def has_traceback(self) -> BoolStr:
-        return BoolStr(self.last_traceback)
+    @classmethod
+    def from_record(cls, record: dict) -> "UpgradeRequest":
+        request = cls.__new__(cls)
+        request.id = record.get("id")
+        request.db_uuid = record.get("db_uuid") or ""
+        request.last_traceback = record.get("last_traceback") or None
+        return request
 
     def __repr__(self) -> str:
         return f"UpgradeRequestDTO({self.id}, {self.db_uuid})"
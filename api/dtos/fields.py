@@ -0,0 +1,12 @@
+from typing import Dict, Iterable, List, Optional
+
+
+# Each DTO declares the fields it reads from a search_read row, with the flag
+# that makes them needed (None when they are always needed), e.g.:
+#     _required_fields = {"name": None, "write_date": "bs4"}
+FieldRequirements = Dict[str, Optional[str]]
+
+
+def required_fields(requirements: FieldRequirements, flags: Iterable[str]) -> List[str]:
+    flags = set(flags)
+    return [field for field, flag in requirements.items() if flag is None or flag in flags]
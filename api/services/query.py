@@ -0,0 +1,97 @@
+import hashlib
+import json
+from typing import (
+    Any,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from odev.plugins.odev_rolling_release.utils.osv import AND, TRUE_DOMAIN, canonical_domain, partition_domain
+from odev.plugins.odev_rolling_release.utils.utils import DaysAgo
+
+
+def _key_value(value: Any) -> Any:
+    if isinstance(value, DaysAgo):
+        return f"{value.days} days ago"
+    if isinstance(value, (list, tuple)):
+        return [_key_value(item) for item in value]
+    return value
+
+
+class Query:
+    # A search_read on a model which never changes: with_* give a new query. The
+    # fields are kept once and the domain canonical, so the same query built twice,
+    # in any order, has the same key and sends the same request.
+
+    __slots__ = ("model_name", "domain", "fields", "limit", "local_fields")
+
+    model_name: str
+    domain: Tuple[Any, ...]
+    fields: Tuple[str, ...]
+    limit: Optional[int]
+    local_fields: FrozenSet[str]
+
+    def __init__(
+        self,
+        model_name: str,
+        domain: Iterable[Any] = (),
+        fields: Iterable[str] = ("id",),
+        limit: Optional[int] = None,
+        local_fields: Iterable[str] = (),
+    ):
+        object.__setattr__(self, "model_name", model_name)
+        object.__setattr__(self, "domain", tuple(canonical_domain(list(domain))))
+        object.__setattr__(self, "fields", tuple(dict.fromkeys(fields)))
+        object.__setattr__(self, "limit", limit)
+        object.__setattr__(self, "local_fields", frozenset(local_fields))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Query is immutable, use with_{name} to get a new one")
+
+    def __repr__(self) -> str:
+        return f"Query({self.model_name}, {list(self.domain)}, {list(self.fields)}, {self.limit})"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Query) and self.key() == other.key() and self.local_fields == other.local_fields
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def _replace(self, **changes: Any) -> "Query":
+        values = {name: getattr(self, name) for name in self.__slots__}
+        return Query(**{**values, **changes})
+
+    def with_domain(self, domain: List[Any]) -> "Query":
+        # ANDed with the current domain, conditions already in it are not added again
+        return self._replace(domain=AND([list(self.domain), domain]) if self.domain else domain)
+
+    def with_fields(self, fields: Iterable[str]) -> "Query":
+        return self._replace(fields=(*self.fields, *fields))
+
+    def with_limit(self, limit: Optional[int]) -> "Query":
+        return self._replace(limit=limit)
+
+    def with_local_fields(self, local_fields: Iterable[str]) -> "Query":
+        return self._replace(local_fields=local_fields)
+
+    def key(self, **kwargs) -> str:
+        # kwargs are the other search_read arguments, like order or offset, and the endpoint
+        key = json.dumps(
+            [self.model_name, _key_value(self.domain), sorted(self.fields), self.limit, kwargs],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def partition(self) -> Tuple["Query", List[Any]]:
+        # the query to send and the domain left to evaluate on its records, see partition_domain.
+        # Whatever the conditions on the local fields, the query sent is the same: it reads them
+        # all and has no limit, which can only be applied once the records are filtered.
+        if not self.local_fields:
+            return self, TRUE_DOMAIN
+        remote, local = partition_domain(list(self.domain), self.local_fields)
+        query = self._replace(domain=remote, local_fields=(), limit=None)
+        return query.with_fields(sorted(self.local_fields)), local
@@ -1,8 +1,18 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from threading import Lock, Thread
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
+    Dict,
     Generic,
+    Iterable,
+    Iterator,
     List,
+    Literal,
     Optional,
     Type,
     TypeVar,
@@ -11,12 +21,66 @@ from typing import (
 from typing_extensions import Self
 
 from odev.common.connectors.rpc import Model, RpcConnector
+from odev.common.logging import logging
 
-from odev.plugins.odev_rolling_release.utils.osv import AND
+from odev.plugins.odev_rolling_release.api.dtos.fields import required_fields
+from odev.plugins.odev_rolling_release.api.services.query import Query
+from odev.plugins.odev_rolling_release.utils.osv import (
+    AND,
+    NOT_OPERATOR,
+    TRUE_DOMAIN,
+    filter_records,
+    normalize_domain,
+)
+from odev.plugins.odev_rolling_release.utils.profiler import Profiler
+
+
+if TYPE_CHECKING:
+    from odev.plugins.odev_rolling_release.datastore.cache import RRCacheStore
 
 
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T")
 
+# seconds given to the cache refreshes still running when the connections close
+REFRESH_JOIN_TIMEOUT = 30
+
+_refresh_threads: List[Thread] = []
+_refresh_lock = Lock()
+
+
+def _start_refresh(thread: Thread) -> None:
+    with _refresh_lock:
+        _refresh_threads[:] = [running for running in _refresh_threads if running.is_alive()]
+        _refresh_threads.append(thread)
+    thread.start()
+
+
+def join_cache_refreshes(timeout: float = REFRESH_JOIN_TIMEOUT) -> None:
+    # the refreshes need the connections, they must be done before these are closed
+    with _refresh_lock:
+        threads, _refresh_threads[:] = list(_refresh_threads), []
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            logger.warning(f"{thread.name} still running after {timeout}s, the cache keeps its stale data")
+
+
+def _sort_key(value: Any) -> tuple:
+    # empty values last, like postgres does for ascending orders
+    return (True, 0) if value is False or value is None else (False, value)
+
+
+def _sort_records(records: List[dict], order: str) -> List[dict]:
+    # "field [asc|desc], ..." as given to search_read, sorted from the last field to the first
+    for term in reversed(order.split(",")):
+        field, *direction = term.split()
+        descending = bool(direction) and direction[0].lower() == "desc"
+        records = sorted(records, key=lambda row: _sort_key(row.get(field)), reverse=descending)
+    return records
+
 
 class Service(Generic[T]):
 
@@ -26,28 +90,74 @@ class Service(Generic[T]):
     odoo_rpc: RpcConnector
     upgrade_rpc: Optional[RpcConnector]
     model_name: str = None
-    domain: List[Any]
-    fields: List[str]
-    limit: int
+    query: Query
+    cache: Optional["RRCacheStore"] = None
+    cache_ttl: int = 0
+    page_size: Optional[int] = None
+    chunk_size: Optional[int] = None
+    max_workers: int = 4
+    profiler: Optional[Profiler] = None
 
     def __init__(self, odoo_rpc: RpcConnector) -> None:
         self.odoo_rpc = odoo_rpc
-        self.domain = []
-        self.fields = ["id"]
+        self.query = Query(self.model_name)
+
+    @property
+    def domain(self) -> List[Any]:
+        return list(self.query.domain)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.query.fields)
+
+    @property
+    def limit(self) -> Optional[int]:
+        return self.query.limit
 
     def _get_model(self, model: str) -> Model:
         return Model(self.odoo_rpc, model)
 
+    # The query builders (with_*) give a copy of the service, the shared services of a
+    # strategy keep their empty query from a search to the next. The settings (set_*:
+    # page size, cache, profiler...) configure the service itself.
+
+    def with_query(self, query: Query) -> Self:
+        service = copy.copy(self)
+        service.query = query
+        return service
+
     def with_domain(self, domain: List[Any]) -> Self:
-        self.domain = AND([self.domain, domain]) if len(self.domain) else domain
-        return self
+        return self.with_query(self.query.with_domain(domain))
 
     def with_fields(self, fields: List[str]) -> Self:
-        self.fields.extend(fields)
+        return self.with_query(self.query.with_fields(fields))
+
+    def with_required_fields(self, flags: Iterable[str]) -> Self:
+        # only the columns the DTO reads with these flags
+        return self.with_fields(required_fields(getattr(self.model_class, "_required_fields", {}), flags))
+
+    def with_limit(self, limit: Optional[int]) -> Self:
+        return self.with_query(self.query.with_limit(limit))
+
+    def with_local_fields(self, local_fields: Iterable[str]) -> Self:
+        # conditions on these fields are evaluated on the fetched records, see partition_domain
+        return self.with_query(self.query.with_local_fields(local_fields))
+
+    def set_page_size(self, page_size: Optional[int]) -> Self:
+        self.page_size = page_size
+        return self
+
+    def set_chunk_size(self, chunk_size: Optional[int]) -> Self:
+        self.chunk_size = chunk_size
+        return self
+
+    def set_profiler(self, profiler: Optional[Profiler]) -> Self:
+        self.profiler = profiler
         return self
 
-    def with_limit(self, limit: int) -> Self:
-        self.limit = limit
+    def set_cache(self, cache: Optional["RRCacheStore"], ttl: int = 0) -> Self:
+        self.cache = cache
+        self.cache_ttl = ttl
         return self
 
     def clean_for_model(self, response: List[dict]) -> List[dict]:
@@ -58,27 +168,216 @@ class Service(Generic[T]):
         # This could be override to allow add more custom data
         return response
 
-    def fetch(self, **kwargs) -> List[T]:
+    def _call(self, method: str, domain: List[Any], **kwargs) -> Any:
+        # every RPC of the services goes through here, timed when a profiler is set
+        model_method = getattr(self._get_model(self.model_name), method)
+        if self.profiler is None:
+            return model_method(domain=domain, **kwargs)
+        return self.profiler.call(self.model_name, method, domain, lambda: model_method(domain=domain, **kwargs))
+
+    def _search_read_page(self, domain: List[Any], fields: List[str], limit: int, **kwargs) -> List[dict]:
+        return self._call("search_read", domain, fields=fields, limit=limit, **kwargs)
+
+    def _iter_pages(
+        self,
+        domain: List[Any],
+        fields: List[str],
+        limit: Optional[int],
+        page_size: int,
+        cursor: Literal["id", "offset"] = "id",
+        **kwargs,
+    ) -> Iterator[List[dict]]:
+        fetched, last_id = 0, 0
+        while not limit or fetched < limit:
+            size = min(page_size, limit - fetched) if limit else page_size
+            if cursor == "id":
+                page_domain = AND([domain, [["id", ">", last_id]]]) if last_id else domain
+                rows = self._search_read_page(page_domain, fields, size, order="id", **kwargs)
+            else:
+                rows = self._search_read_page(domain, fields, size, offset=fetched, order="id", **kwargs)
+            if rows:
+                fetched += len(rows)
+                last_id = rows[-1]["id"]
+                yield rows
+            if len(rows) < size:
+                break
+
+    def _split_domain(self, domain: List[Any]) -> List[List[Any]]:
+        # Split the biggest "in" leaf of the domain, the union of the chunked domains
+        # gives the same records as long as the leaf is not negated.
+        normalized = normalize_domain(domain)
+        if not self.chunk_size or NOT_OPERATOR in normalized:
+            return [domain]
+        leaves = [
+            (index, leaf)
+            for index, leaf in enumerate(normalized)
+            if isinstance(leaf, tuple) and len(leaf) == 3 and leaf[1] == "in" and isinstance(leaf[2], (list, tuple))
+        ]
+        if not leaves:
+            return [domain]
+        index, (field, operator, values) = max(leaves, key=lambda leaf: len(leaf[1][2]))
+        if len(values) <= self.chunk_size:
+            return [domain]
+        chunks = [list(values[start : start + self.chunk_size]) for start in range(0, len(values), self.chunk_size)]
+        return [normalized[:index] + [(field, operator, chunk)] + normalized[index + 1 :] for chunk in chunks]
+
+    def _search_read(self, domain: List[Any], fields: List[str], limit: int, **kwargs) -> List[dict]:
+        domains = self._split_domain(domain)
+        if len(domains) == 1:
+            return self._search_read_unchunked(domain, fields, limit, **kwargs)
+
+        logger.debug(f"Splitting {self.model_name} query in {len(domains)} chunks")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(domains))) as executor:
+            responses = executor.map(lambda chunk: self._search_read_unchunked(chunk, fields, limit, **kwargs), domains)
+            records = list({row["id"]: row for response in responses for row in response}.values())
+        if "order" in kwargs:
+            # every chunk is ordered, not their concatenation
+            records = _sort_records(records, kwargs["order"])
+        return records[:limit] if limit else records
+
+    def _search_read_unchunked(self, domain: List[Any], fields: List[str], limit: int, **kwargs) -> List[dict]:
+        if not self.page_size or (limit and limit <= self.page_size) or "order" in kwargs:
+            return self._search_read_page(domain, fields, limit, **kwargs)
+        return [row for page in self._iter_pages(domain, fields, limit, self.page_size, **kwargs) for row in page]
+
+    def _search_query(self, query: Query, **kwargs) -> List[dict]:
+        return self._search_read(list(query.domain), list(query.fields), query.limit, **kwargs)
+
+    def _refresh_cache(self, key: str, query: Query, **kwargs) -> None:
+        try:
+            self.cache.set(key, self.model_name, self._search_query(query, **kwargs))
+        except Exception as error:
+            logger.warning(f"Could not refresh the cached {self.model_name}, stale data will be served again: {error}")
+
+    def _read(self, query: Query, **kwargs) -> List[dict]:
+        # the same remote query, and cache entry, serves every local filter
+        remote_query, local_domain = query.partition()
+        response = self._read_remote(remote_query, **kwargs)
+        if local_domain != TRUE_DOMAIN:
+            response = filter_records(local_domain, response)
+        return response[: query.limit] if query.limit else response
+
+    def _endpoint(self) -> str:
+        database = self.odoo_rpc.database
+        return f"{database.url}/{database.name}"
+
+    def _cache_key(self, query: Query, **kwargs) -> str:
+        # two servers with the same model and domain do not share their entries
+        return query.key(endpoint=self._endpoint(), **kwargs)
+
+    def _read_remote(self, query: Query, **kwargs) -> List[dict]:
+        if not self.cache:
+            return self._search_query(query, **kwargs)
+
+        key = self._cache_key(query, **kwargs)
+        cached = self.cache.get(key)
+        if cached is None:
+            response = self._search_query(query, **kwargs)
+            self.cache.set(key, self.model_name, response)
+            return response
+
+        response, age = cached
+        if age > self.cache_ttl:
+            # stale while revalidate: answer now, next run will get the fresh data
+            logger.debug(f"Serving stale {self.model_name} ({int(age)}s old), refreshing it")
+            thread = Thread(
+                target=self._refresh_cache,
+                args=(key, query),
+                kwargs=kwargs,
+                name=f"Refresh of {self.model_name}",
+            )
+            _start_refresh(thread)
+        return response
+
+    def execute(self, query: Query, **kwargs) -> List[dict]:
+        # runs the query given, the query of the service is only a default
+        if not self.model_name:
+            raise ValueError("No model defined on Service")
+        return self.clean_for_model(self._read(query, **kwargs))
+
+    def fetch_records(self, **kwargs) -> List[dict]:
+        return self.execute(self.query, **kwargs)
+
+    def fetch_ids(self, **kwargs) -> List[int]:
+        if not self.model_name:
+            raise ValueError("No model defined on Service")
+        return [row["id"] for row in self._search_read(self.domain, ["id"], self.limit, **kwargs)]
+
+    def count(self) -> int:
+        return self._call("search_count", self.domain)
+
+    def fetch_pages(
+        self,
+        page_size: Optional[int] = None,
+        cursor: Literal["id", "offset"] = "id",
+        plan: bool = True,
+        **kwargs,
+    ) -> Iterator[List[T]]:
+        # without plan, no search_count: the first page comes after a single round trip
         if not self.model_name:
             raise ValueError("No model defined on Service")
 
         if not self.model_class:
             raise ValueError("No concrete model class specified")
 
-        response: List[dict] = self.clean_for_model(
-            self._get_model(self.model_name).search_read(
-                domain=self.domain, fields=self.fields, limit=self.limit, **kwargs
-            )
-        )
-        return [self.model_class(**self._add_response(row)) for row in response]
+        expected = self.limit
+        if plan:
+            total = self.count()
+            if self.limit and total > self.limit:
+                logger.warning(f"{total} {self.model_name} records match, only the first {self.limit} will be fetched")
+            expected = min(total, self.limit) if self.limit else total
+            if not expected:
+                return
+
+        page_size = page_size or self.page_size or expected
+        if not page_size:
+            raise ValueError("No page size nor limit to page the records")
+        if expected:
+            logger.debug(f"Fetching {expected} {self.model_name} records in {ceil(expected / page_size)} pages")
+
+        for rows in self._iter_pages(self.domain, self.fields, expected, page_size, cursor, **kwargs):
+            yield [self.model_class.from_record(self._add_response(row)) for row in self.clean_for_model(rows)]
+
+    def fetch(self, **kwargs) -> List[T]:
+        if not self.model_class:
+            raise ValueError("No concrete model class specified")
+
+        response: List[dict] = self.fetch_records(**kwargs)
+        return [self.model_class.from_record(self._add_response(row)) for row in response]
 
     def _clean_stats(self, datalist: List[dict], union_wrapper: Optional[Callable] = None):
         return datalist if not callable(union_wrapper) else union_wrapper(datalist)
 
-    def fetch_group(self, group_by: List[str], union_wrapper: Optional[Callable] = None):
-        response: List[dict] = self._get_model(self.model_name).read_group(
-            domain=self.domain,
-            groupby=group_by,
-            limit=self.limit,
-        )
+    def _read_group(self, domain: List[Any], group_by: List[str], **kwargs) -> List[dict]:
+        return self._call("read_group", domain, groupby=group_by, limit=self.limit, **kwargs)
+
+    def _merge_groups(self, responses: Iterable[List[dict]], group_by: List[str]) -> List[dict]:
+        # the chunks hold disjoint records, the same group found in several chunks adds up its counts
+        groups: Dict[tuple, dict] = {}
+        for response in responses:
+            for row in response:
+                key = tuple(self._group_value(row.get(field)) for field in group_by)
+                if key not in groups:
+                    groups[key] = dict(row)
+                    continue
+                for name, count in row.items():
+                    if name.endswith("_count"):
+                        groups[key][name] += count
+        merged = list(groups.values())
+        return merged[: self.limit] if self.limit else merged
+
+    @staticmethod
+    def _group_value(value: Any) -> Any:
+        # many2one groups come as [id, display_name]
+        return tuple(value) if isinstance(value, list) else value
+
+    def fetch_group(self, group_by: List[str], union_wrapper: Optional[Callable] = None, **kwargs):
+        domains = self._split_domain(self.domain)
+        if len(domains) == 1:
+            response = self._read_group(self.domain, group_by, **kwargs)
+        else:
+            logger.debug(f"Splitting {self.model_name} read_group in {len(domains)} chunks")
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(domains))) as executor:
+                responses = executor.map(lambda chunk: self._read_group(chunk, group_by, **kwargs), domains)
+                response = self._merge_groups(responses, group_by)
         return self._clean_stats(response, union_wrapper)
@@ -1,3 +1,5 @@
+import copy
+
 from typing_extensions import Self
 
 from odev.plugins.odev_rolling_release.api.dtos.Task import Task
@@ -12,12 +14,14 @@ class TaskService(Service[Task]):
     upgrade_mode: bool = False
 
     def with_sub(self) -> Self:
-        self.show_sub = True
-        return self
+        service = copy.copy(self)
+        service.show_sub = True
+        return service
 
     def with_upgrade_mode(self) -> Self:
-        self.upgrade_mode = True
-        return self
+        service = copy.copy(self)
+        service.upgrade_mode = True
+        return service
 
     def _add_response(self, response: dict) -> dict:
         response = super()._add_response(response)
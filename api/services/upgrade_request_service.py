@@ -1,7 +1,11 @@
-from itertools import groupby
-from typing import List
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from typing_extensions import Self
 
 from odev.plugins.odev_rolling_release.api.dtos.UpgradeRequest import UpgradeRequest
+from odev.plugins.odev_rolling_release.api.services.query import Query
 from odev.plugins.odev_rolling_release.api.services.service_abstract import Service
 
 
@@ -10,10 +14,56 @@ class UpgradeRequestService(Service[UpgradeRequest]):
     model_class = UpgradeRequest
     is_upgrade_model = True
 
-    def clean_for_model(self, response: List[dict]) -> List[dict]:
-        response = super().clean_for_model(response)
-        response.sort(key=lambda r: r["db_uuid"])
-        requests = []
-        for _, group in groupby(response, lambda r: r["db_uuid"]):
-            requests.append(max(group, key=lambda x: x["id"]))
-        return requests
+    # None only tells if there is a traceback, without downloading it
+    traceback_length: Optional[int] = None
+
+    def with_traceback(self, max_length: int = 500) -> Self:
+        service = copy.copy(self)
+        service.traceback_length = max_length
+        return service
+
+    def _cache_key(self, query: Query, **kwargs) -> str:
+        # the flags and the truncated tracebacks are different responses
+        return super()._cache_key(query, traceback_length=self.traceback_length, **kwargs)
+
+    def _read_group_latest(self, domain: List[Any]) -> Dict[int, str]:
+        groups = self._call(
+            "read_group",
+            domain,
+            fields=["id:max"],
+            groupby=["db_uuid"],
+            lazy=False,
+        )
+        return {group["id"]: group["db_uuid"] for group in groups if group.get("id")}
+
+    def _get_latest_ids(self, domain: List[Any]) -> Dict[int, str]:
+        # newest request id by db_uuid, computed by the server
+        domains = self._split_domain(domain)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(domains))) as executor:
+            latest: Dict[int, str] = {}
+            for response in executor.map(self._read_group_latest, domains):
+                latest.update(response)
+        return latest
+
+    def _search_read(self, domain: List[Any], fields: List[str], limit: int, **kwargs) -> List[dict]:
+        latest = self._get_latest_ids(domain)
+        if limit:
+            latest = dict(sorted(latest.items(), reverse=True)[:limit])
+        rows = [{"id": request_id, "db_uuid": db_uuid} for request_id, db_uuid in latest.items()]
+        if "last_traceback" not in fields or not rows:
+            return rows
+
+        ids_domain = [["id", "in", list(latest)]]
+        if self.traceback_length is None:
+            traceback_domain = [["last_traceback", "!=", False]] + ids_domain
+            with_traceback = {row["id"] for row in super()._search_read(traceback_domain, ["id"], None)}
+            for row in rows:
+                row["last_traceback"] = row["id"] in with_traceback
+            return rows
+
+        tracebacks = {row["id"]: row["last_traceback"] for row in super()._search_read(ids_domain, fields, None)}
+        for row in rows:
+            # the end of a traceback holds the error
+            traceback = tracebacks.get(row["id"]) or ""
+            row["last_traceback"] = traceback[-self.traceback_length :] or False
+        return rows
@@ -1,21 +1,77 @@
-from datetime import datetime, timedelta
-from typing import Any, List
+from typing import Any, List, Optional, Set
 
+from typing_extensions import Self
+
+from odev.plugins.odev_rolling_release.api.dtos.Database import Database
 from odev.plugins.odev_rolling_release.api.dtos.Task import Task
+from odev.plugins.odev_rolling_release.api.services.task_service import TaskService
 from odev.plugins.odev_rolling_release.api.strategy.title_strategy import TitleStrategy
+from odev.plugins.odev_rolling_release.datastore.task_url import RRTaskUrlStore
+from odev.plugins.odev_rolling_release.utils.links import extract_links
 
 
 class Bs4Strategy(TitleStrategy):
-    def _task_fields(self) -> List[str]:
-        domain = super()._task_fields()
-        domain.append("description")
-        return domain
+    url_store: Optional[RRTaskUrlStore] = None
+
+    def with_url_store(self, url_store: RRTaskUrlStore) -> Self:
+        self.url_store = url_store
+        return self
+
+    def _get_field_flags(self) -> Set[str]:
+        # descriptions are only fetched for tasks without a known url, see _set_database_urls
+        return super()._get_field_flags() | {"bs4"}
+
+    def _fetch_descriptions(self, tasks: List[Task]) -> List[str]:
+        descriptions = {
+            row["id"]: row["description"]
+            for row in TaskService(self.odoo_rpc)
+            .set_profiler(self.profiler)
+            .set_chunk_size(self.chunk_size)
+            .with_fields(["description"])
+            .with_domain([["id", "in", [task.id for task in tasks]]])
+            .with_limit(None)
+            .fetch_records()
+        }
+        return extract_links([descriptions.get(task.id) for task in tasks])
+
+    def _set_database_urls(self, tasks: List[Task]) -> None:
+        known_urls = (
+            self.url_store.get_many({task.id: task.write_date for task in tasks if task.write_date})
+            if self.url_store
+            else {}
+        )
+        missing_tasks = []
+        for task in tasks:
+            if task.id in known_urls:
+                task.database_url = known_urls[task.id]
+            else:
+                missing_tasks.append(task)
+        if not missing_tasks:
+            return
+
+        for task, url in zip(missing_tasks, self._fetch_descriptions(missing_tasks)):
+            task.database_url = url
+        if self.url_store:
+            self.url_store.set_many(
+                [(task.id, task.write_date, task.database_url) for task in missing_tasks if task.write_date]
+            )
+
+    def _prepare_tasks(self, tasks: List[Task]) -> List[Task]:
+        tasks = super()._prepare_tasks(tasks)
+        self._set_database_urls(tasks)
+        return tasks
+
+    def _task_key(self, task: Task) -> str:
+        # tasks without a link must not collapse into one, their id matches no database url
+        return task.database_url or str(task.id)
+
+    def _database_key(self, database: Database) -> str:
+        return database.url.rstrip("/")
 
-    def _get_database_domain(self, tasks: List[Task]) -> List[Any]:
-        today = datetime.now()
+    def _get_databases_domain(self, tasks: List[Task]) -> List[Any]:
         domain = [
             "&",
-            ["url", "in", [task.database_url for task in tasks]],
-            ["last_ping", ">", (today - timedelta(days=30)).strftime("%Y-%m-%d")],
+            ["url", "in", [task.database_url for task in tasks if task.database_url]],
+            ["last_ping", ">", self._get_last_ping_date()],
         ]
         return self._add_database_extra_config_domains(domain)
@@ -0,0 +1,193 @@
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+from typing_extensions import Self
+
+from odev.common.console import TableHeader
+from odev.common.logging import logging
+
+from odev.plugins.odev_rolling_release.api.dtos.Database import Database
+from odev.plugins.odev_rolling_release.api.dtos.Subscription import Subscription
+from odev.plugins.odev_rolling_release.api.dtos.Task import Task
+from odev.plugins.odev_rolling_release.api.services.database_service import DatabaseService
+from odev.plugins.odev_rolling_release.api.services.sale_order_service import SaleOrderService
+from odev.plugins.odev_rolling_release.api.services.service_abstract import Service
+from odev.plugins.odev_rolling_release.api.services.task_service import TaskService
+from odev.plugins.odev_rolling_release.api.services.upgrade_request_service import UpgradeRequestService
+from odev.plugins.odev_rolling_release.api.strategy.plan import SearchPlan
+from odev.plugins.odev_rolling_release.api.strategy.title_strategy import TitleStrategy
+from odev.plugins.odev_rolling_release.datastore.mirror import (
+    DATABASE_MODEL,
+    SALE_ORDER_MODEL,
+    TASK_MODEL,
+    RRMirrorStore,
+)
+from odev.plugins.odev_rolling_release.utils.osv import AND
+from odev.plugins.odev_rolling_release.utils.pivot import Pivot
+from odev.plugins.odev_rolling_release.utils.record_batch import RecordBatch
+from odev.plugins.odev_rolling_release.utils.scheduler import StageScheduler
+from odev.plugins.odev_rolling_release.utils.utils import many2one_id
+
+
+logger = logging.getLogger(__name__)
+
+MirrorRecords = List[Tuple[int, str, Optional[dict], Optional[dict]]]
+
+
+class MirrorStrategy(TitleStrategy):
+    mirror: RRMirrorStore
+
+    def with_mirror(self, mirror: RRMirrorStore) -> Self:
+        self.mirror = mirror
+        return self
+
+    # --- Sync ---------------------------------------------------------------
+
+    def _sync_model(
+        self,
+        service_class: Type[Service],
+        domain: List[Any],
+        fields: List[str],
+    ) -> Tuple[int, int]:
+        model = service_class.model_name
+        remote_ids = set(self._get_fresh_service(service_class).with_domain(domain).fetch_ids())
+        local_ids = self.mirror.get_ids(model)
+
+        records: List[dict] = []
+        if cursor := self.mirror.get_cursor(model):
+            records = (
+                self._get_fresh_service(service_class)
+                .with_fields(fields + ["write_date"])
+                .with_domain(AND([domain, [["write_date", ">=", cursor]]]))
+                .fetch_records()
+            )
+        # records never mirrored, or all of them on the first sync
+        missing_ids = remote_ids - local_ids - {record["id"] for record in records}
+        if missing_ids:
+            records += (
+                self._get_fresh_service(service_class)
+                .with_fields(fields + ["write_date"])
+                .with_domain([["id", "in", list(missing_ids)]])
+                .fetch_records()
+            )
+
+        deleted_ids = local_ids - remote_ids
+        self.mirror.upsert(model, records)
+        self.mirror.delete(model, deleted_ids)
+        return len(records), len(deleted_ids)
+
+    def sync(self) -> Dict[str, Tuple[int, int]]:
+        result = {TASK_MODEL: self._sync_model(TaskService, self.task_domain, ["name"])}
+
+        db_names = [Task.from_record(task).display_name for task in self.mirror.get_records(TASK_MODEL)]
+        result[DATABASE_MODEL] = self._sync_model(
+            DatabaseService,
+            [["db_name", "in", db_names]],
+            ["subscription_id", "version", "url", "db_name", "db_uuid", "parent_id", "date_valid", "last_ping"],
+        )
+
+        sub_ids: Set[int] = {
+            many2one_id(database.get("subscription_id"))
+            for database in self.mirror.get_records(DATABASE_MODEL)
+            if database.get("subscription_id")
+        }
+        result[SALE_ORDER_MODEL] = self._sync_model(
+            SaleOrderService,
+            [["id", "in", list(sub_ids)]],
+            ["client_order_ref"],
+        )
+
+        for model, (updated, deleted) in result.items():
+            logger.info(f"Mirror {model}: {updated} updated, {deleted} deleted")
+        return result
+
+    # --- Search -------------------------------------------------------------
+
+    def _fetch_mirror_records(self) -> MirrorRecords:
+        return self.mirror.search(
+            self._get_last_ping_date(),
+            task_names=self.task_names,
+            parent=self.parent,
+            contract=self.contract,
+            # like the server search, the tickets without a database are only dropped by _merge_records,
+            # so that their names are found
+            hide_not_found=False,
+            limit=self.top or self.limit,
+            order_by_validity=self.order_by_validity,
+        )
+
+    def _split_tasks(self, records: MirrorRecords) -> List[Task]:
+        return [
+            Task.from_record(
+                {
+                    "id": task_id,
+                    "name": name,
+                    "show_sub": self.show_sub,
+                    "upgrade_mode": bool(self.upgrade_rpc),
+                }
+            )
+            for task_id, name, _, _ in records
+        ]
+
+    def _split_databases(self, records: MirrorRecords) -> List[Database]:
+        return [Database.from_record(database) for _, _, database, _ in records if database]
+
+    def _split_subscriptions(self, records: MirrorRecords) -> List[Subscription]:
+        return [Subscription.from_record(subscription) for _, _, _, subscription in records if subscription]
+
+    def _sample_lucky(self) -> RecordBatch:
+        # the mirror gives every row in one local query, no round trip to save
+        return self._search_rows(self.plan_search())
+
+    def search_stream(
+        self, page_size: int = 50, fixed_widths: bool = True
+    ) -> Iterator[List[List[TableHeader] | List[dict]]]:
+        # the mirror answers in one local query, no need to page it
+        yield self.search()
+
+    def plan_search(self, tasks: Optional[List[Task]] = None) -> SearchPlan:
+        plan = (
+            SearchPlan()
+            .add("records", self._fetch_mirror_records, model=RRMirrorStore.name)
+            .add("tasks", self._split_tasks, ["records"])
+            .add("databases", self._split_databases, ["records"])
+            .add("subscriptions", self._split_subscriptions, ["records"])
+        )
+        if self.upgrade_rpc:
+            plan.add(
+                "upgrade_requests",
+                self._fetch_upgrade_requests,
+                ["databases"],
+                UpgradeRequestService.model_name,
+                self._planned_fields(UpgradeRequestService),
+            )
+        else:
+            plan.skip("upgrade_requests", "no --upgrade")
+        return plan
+
+    def _fetch_mirror_pivot(self) -> Pivot:
+        dimensions = [dimension for dimension, _ in self._get_stats_dimensions()]
+        groups = self.mirror.stats(
+            dimensions,
+            self._get_last_ping_date(),
+            task_names=self.task_names,
+            parent=self.parent,
+            contract=self.contract,
+        )
+        return Pivot(groups, dimensions)
+
+    def _get_stats_scheduler(self) -> StageScheduler:
+        scheduler = self._get_scheduler().add_stage("pivot", self._fetch_mirror_pivot)
+        if self.upgrade_rpc:
+            scheduler.add_stage("records", self._fetch_mirror_records)
+            scheduler.add_stage("databases", self._split_databases, ["records"])
+            scheduler.add_stage("upgrade", self._fetch_upgrade_stats, ["databases"])
+        return scheduler
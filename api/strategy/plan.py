@@ -0,0 +1,83 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from typing_extensions import Self
+
+from odev.plugins.odev_rolling_release.utils.scheduler import StageScheduler
+
+
+class PlannedStage:
+    name: str
+    func: Callable[..., Any]
+    depends: List[str]
+    model: Optional[str]
+    fields: List[str]
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends: Optional[List[str]] = None,
+        model: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.depends = depends or []
+        self.model = model
+        self.fields = fields or []
+
+    def __repr__(self) -> str:
+        return f"PlannedStage({self.name}, {self.model}, {self.fields})"
+
+
+class SearchPlan:
+    # Stages a search needs for the active flags, decided before any query is sent.
+    # Skipped stages keep a reason for the explanation and a default result.
+
+    stages: List[PlannedStage]
+    skipped: Dict[str, Tuple[str, Any]]
+
+    def __init__(self):
+        self.stages = []
+        self.skipped = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends: Optional[List[str]] = None,
+        model: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Self:
+        self.stages.append(PlannedStage(name, func, depends, model, fields))
+        return self
+
+    def skip(self, name: str, reason: str, default: Any = None) -> Self:
+        self.skipped[name] = (reason, default)
+        return self
+
+    def defaults(self) -> Dict[str, Any]:
+        return {name: default for name, (_, default) in self.skipped.items()}
+
+    def scheduler(self, scheduler: StageScheduler) -> StageScheduler:
+        for stage in self.stages:
+            scheduler.add_stage(stage.name, stage.func, stage.depends)
+        return scheduler
+
+    def run(self, scheduler: StageScheduler) -> Dict[str, Any]:
+        return {**self.defaults(), **self.scheduler(scheduler).run()}
+
+    def explain_rows(self) -> List[Tuple[str, str, str, str]]:
+        # (stage, model, depends, fields or the reason it is skipped)
+        rows = [
+            (stage.name, stage.model or "", ", ".join(stage.depends), ", ".join(stage.fields)) for stage in self.stages
+        ]
+        rows += [(name, "", "", f"skipped: {reason}") for name, (reason, _) in self.skipped.items()]
+        return rows
@@ -1,5 +1,12 @@
 from abc import abstractmethod
-from typing import Any, Callable, List, Optional
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
 
 from typing_extensions import Self
 
@@ -7,6 +14,10 @@ from odev.common.connectors.rpc import RpcConnector
 from odev.common.console import TableHeader
 
 from odev.plugins.odev_rolling_release.api.dtos.Task import Task
+from odev.plugins.odev_rolling_release.api.strategy.plan import SearchPlan
+from odev.plugins.odev_rolling_release.utils.osv import ilike
+from odev.plugins.odev_rolling_release.utils.profiler import Profiler
+from odev.plugins.odev_rolling_release.utils.record_batch import RecordBatch
 from odev.plugins.odev_rolling_release.utils.utils import TripleFlag
 
 
@@ -14,7 +25,8 @@ class Strategy:
     odoo_url: str
     odoo_rpc: RpcConnector
     upgrade_rpc: Optional[RpcConnector] = None
-    task_name: Optional[str] = None
+    task_names: List[str] = []
+    matched_task_names: Set[str]
     task_domain: List[Any] = []
     limit: int
     parent: TripleFlag = TripleFlag.BOTH
@@ -23,6 +35,9 @@ class Strategy:
     hide_not_found: bool = True
     lucky: bool = False
     order_by_validity = False
+    top: Optional[int] = None
+    traceback_length: Optional[int] = None
+    profiler: Optional[Profiler] = None
 
     def __init__(
         self,
@@ -38,11 +53,32 @@ class Strategy:
         self.odoo_rpc = odoo_rpc
         self.upgrade_rpc = upgrade_rpc
         self.odoo_url = odoo_url
+        self.matched_task_names = set()
 
-    def with_task_name(self, task_name: str) -> Self:
-        self.task_name = task_name
+    def with_profiler(self, profiler: Optional[Profiler]) -> Self:
+        self.profiler = profiler
+        return self
+
+    def with_task_names(self, task_names: List[str]) -> Self:
+        self.task_names = task_names
         return self
 
+    def with_task_name(self, task_name: str) -> Self:
+        return self.with_task_names([task_name])
+
+    def _match_task_names(self, names: Iterable[str]) -> None:
+        # remember which searched names are in the result, like the ilike on the server
+        remaining = [task_name for task_name in self.task_names if task_name not in self.matched_task_names]
+        for name in names:
+            if not remaining:
+                return
+            matched = [task_name for task_name in remaining if ilike(name, f"%{task_name}%")]
+            self.matched_task_names.update(matched)
+            remaining = [task_name for task_name in remaining if task_name not in matched]
+
+    def unmatched_task_names(self) -> List[str]:
+        return [task_name for task_name in self.task_names if task_name not in self.matched_task_names]
+
     def with_parent(self, parent: TripleFlag = TripleFlag.YES) -> Self:
         self.parent = parent
         return self
@@ -67,18 +103,44 @@ class Strategy:
         self.order_by_validity = True
         return self
 
+    def with_top(self, top: int) -> Self:
+        # only the top databases expiring first
+        self.top = top
+        return self.with_order_by_validity()
+
+    def with_traceback_length(self, traceback_length: int) -> Self:
+        # the end of the tracebacks instead of YES/NO
+        self.traceback_length = traceback_length
+        return self
+
+    @abstractmethod
+    def plan_search(self, tasks: Optional[List[Task]] = None) -> SearchPlan:
+        raise NotImplementedError
+
     @abstractmethod
     def search(self) -> List[List[TableHeader] | List[dict]]:
         raise NotImplementedError
 
     @abstractmethod
-    def _transform_to_rows(self, tasks: List[Task]) -> List[Any]:
+    def search_stream(
+        self, page_size: int = 50, fixed_widths: bool = True
+    ) -> Iterator[List[List[TableHeader] | List[dict]]]:
+        raise NotImplementedError
+
+    def get_titles(self) -> List[TableHeader]:
+        # the columns of the search, known before any row
+        return self._display_task_list([])[0]
+
+    @abstractmethod
+    def _transform_to_rows(self, batch: RecordBatch) -> List[Any]:
         raise NotImplementedError
 
     @abstractmethod
-    def _display_task_list(self, rows: List[List[Any]]) -> List[List[TableHeader] | List[dict]]:
+    def _display_task_list(
+        self, rows: List[List[Any]], link_width: int = 0, name_width: int = 0
+    ) -> List[List[TableHeader] | List[dict]]:
         raise NotImplementedError
 
     @abstractmethod
-    def stats(self, group_by: List[str], union_wrapper: Optional[Callable]) -> List[List[Any]]:
+    def stats(self) -> List[List[List[TableHeader] | List[dict]]]:
         raise NotImplementedError
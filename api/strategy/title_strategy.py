@@ -1,24 +1,78 @@
 import random
-from datetime import datetime, timedelta
-from typing import Any, Callable, List, Optional
+import time
+from array import array
+from datetime import datetime
+from math import ceil, isnan
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+from typing_extensions import Self
 
 from odev.common.connectors.rpc import RpcConnector
 from odev.common.console import TableHeader
 
 from odev.plugins.odev_rolling_release.api.dtos.Database import Database
+from odev.plugins.odev_rolling_release.api.dtos.fields import required_fields
 from odev.plugins.odev_rolling_release.api.dtos.Subscription import Subscription
 from odev.plugins.odev_rolling_release.api.dtos.Task import Task
 from odev.plugins.odev_rolling_release.api.dtos.UpgradeRequest import UpgradeRequest
 from odev.plugins.odev_rolling_release.api.services.database_service import DatabaseService
 from odev.plugins.odev_rolling_release.api.services.sale_order_service import SaleOrderService
+from odev.plugins.odev_rolling_release.api.services.service_abstract import Service
 from odev.plugins.odev_rolling_release.api.services.task_service import TaskService
 from odev.plugins.odev_rolling_release.api.services.upgrade_request_service import UpgradeRequestService
+from odev.plugins.odev_rolling_release.api.strategy.plan import SearchPlan
 from odev.plugins.odev_rolling_release.api.strategy.strategy_abstract import Strategy
-from odev.plugins.odev_rolling_release.utils.osv import AND
-from odev.plugins.odev_rolling_release.utils.utils import TripleFlag, list_to_dict
+from odev.plugins.odev_rolling_release.api.strategy.watch import WatchState, watch_cursor
+from odev.plugins.odev_rolling_release.datastore.cache import RRCacheStore
+from odev.plugins.odev_rolling_release.utils.osv import AND, OR
+from odev.plugins.odev_rolling_release.utils.pivot import Pivot
+from odev.plugins.odev_rolling_release.utils.profiler import Profiler, profile_stage
+from odev.plugins.odev_rolling_release.utils.record_batch import MISSING, RecordBatch
+from odev.plugins.odev_rolling_release.utils.scheduler import StageScheduler
+from odev.plugins.odev_rolling_release.utils.utils import (
+    BoolStr,
+    DaysAgo,
+    TripleFlag,
+    group_by_record_exists,
+    list_to_dict,
+    yes_or_no_value,
+)
+
+
+# the --parent and --contract conditions are checked on the fetched databases, so that
+# every combination of them shares the same query, and cache entry
+DATABASE_LOCAL_FIELDS = ["parent_id", "subscription_id"]
+
+# databases which did not ping the server for longer are not shown
+LAST_PING_DAYS = 30
+
+VALIDITY_ORDER = "date_valid asc"
+
+# tasks enriched by --lucky at each try, most of them pass the filters
+LUCKY_WINDOW = 10
+
+# tables shown in several parts (stream pages, watch ticks) keep the same widths:
+# longer task names are cut to TASK_NAME_WIDTH
+TASK_NAME_WIDTH = 40
+# watched tasks created later can have ids with one more digit, their links too
+LINK_ID_MARGIN = 1
 
 
 class TitleStrategy(Strategy):
+    page_size: Optional[int] = None
+    chunk_size: Optional[int] = None
+
     def __init__(
         self,
         task_domain: List[Any],
@@ -34,14 +88,57 @@ class TitleStrategy(Strategy):
         if upgrade_rpc:
             self.upgrade_request_service = UpgradeRequestService(upgrade_rpc)
 
-    def _task_fields(self) -> List[str]:
-        # To be able to override and not create monkeypatches
-        return ["name"]
+    def _get_services(self) -> List[Service]:
+        services = [self.task_service, self.database_service, self.sale_order_service]
+        if self.upgrade_rpc:
+            services.append(self.upgrade_request_service)
+        return services
+
+    def with_page_size(self, page_size: Optional[int]) -> Self:
+        self.page_size = page_size
+        for service in self._get_services():
+            service.set_page_size(page_size)
+        return self
+
+    def with_chunk_size(self, chunk_size: Optional[int]) -> Self:
+        self.chunk_size = chunk_size
+        for service in self._get_services():
+            service.set_chunk_size(chunk_size)
+        return self
+
+    def with_profiler(self, profiler: Optional[Profiler]) -> Self:
+        super().with_profiler(profiler)
+        for service in self._get_services():
+            service.set_profiler(profiler)
+        return self
+
+    def _get_scheduler(self) -> StageScheduler:
+        return StageScheduler(profiler=self.profiler)
+
+    def with_cache(self, cache: RRCacheStore, ttl: Dict[str, int]) -> Self:
+        for service in self._get_services():
+            service.set_cache(cache, ttl.get(service.model_name, 0))
+        return self
+
+    def without_cache(self) -> Self:
+        for service in self._get_services():
+            service.set_cache(None)
+        return self
+
+    def _get_field_flags(self) -> Set[str]:
+        # flags deciding which DTO fields are displayed, see _required_fields on the DTOs
+        flags = set()
+        if self.show_sub:
+            flags.add("show_sub")
+        if self.upgrade_rpc:
+            flags.add("upgrade_mode")
+        return flags
 
     def _get_tasks_domain(self) -> List[Any]:
         domain = self.task_domain
-        if self.task_name:
-            new_domain = [["name", "ilike", f"%{self.task_name}%"]]
+        if self.task_names:
+            # one query for all the names
+            new_domain = OR([[["name", "ilike", f"%{task_name}%"]] for task_name in self.task_names])
             domain = AND([domain, new_domain])
         return domain
 
@@ -56,12 +153,14 @@ class TitleStrategy(Strategy):
                 domain = AND([domain, new_domain])
         return domain
 
+    def _get_last_ping_date(self) -> str:
+        return DaysAgo(LAST_PING_DAYS)
+
     def _get_databases_domain(self, tasks: List[Task]) -> List[Any]:
-        today = datetime.now()
         domain = [
             "&",
             ["db_name", "in", [task.display_name for task in tasks]],
-            ["last_ping", ">", (today - timedelta(days=30)).strftime("%Y-%m-%d")],
+            ["last_ping", ">", self._get_last_ping_date()],
         ]
         return self._add_database_extra_config_domains(domain)
 
@@ -77,44 +176,139 @@ class TitleStrategy(Strategy):
             ["active", "in", [True, False]],
         ]
 
+    def _task_key(self, task: Task) -> str:
+        return task.display_name
+
+    def _database_key(self, database: Database) -> str:
+        return database.db_name
+
+    def _get_task_batch(self, tasks: List[Task]) -> RecordBatch:
+        # last task wins when several share the same key
+        return RecordBatch.from_records(
+            list(list_to_dict(tasks, self._task_key).values()),
+            {
+                "id": ("q", lambda task: task.id),
+                "key": (None, self._task_key),
+                "name": (None, lambda task: task.name),
+            },
+        )
+
+    def _get_database_batch(self, databases: List[Database]) -> RecordBatch:
+        return RecordBatch.from_records(
+            databases,
+            {
+                "key": (None, self._database_key),
+                "version": (None, lambda database: database.version),
+                "db_uuid": (None, lambda database: database.db_uuid),
+                "parent": ("b", lambda database: bool(database.parent_id)),
+                "subscription_id": ("q", lambda database: database.subscription_id or 0),
+                "date_valid": (
+                    "d",
+                    lambda database: database.date_valid.timestamp() if database.date_valid else float("nan"),
+                ),
+            },
+        )
+
+    def _filter_batch(self, batch: RecordBatch) -> RecordBatch:
+        found = batch["found"]
+        mask = list(found) if self.hide_not_found else [True] * len(batch)
+        for column_name, value in (("parent", self.parent), ("subscription_id", self.contract)):
+            if value == TripleFlag.BOTH:
+                continue
+            column, expected = batch[column_name], value == TripleFlag.YES
+            # not found databases are not filtered, like on the server
+            mask = [keep and (not found[index] or bool(column[index]) == expected) for index, keep in enumerate(mask)]
+        return batch.filter(mask)
+
     def _merge_records(
         self,
         tasks: List[Task],
         databases: List[Database],
         subs: List[Subscription],
         upgrade_request: Optional[List[UpgradeRequest]] = None,
-    ) -> List[Task]:
-        transformed_tasks = list_to_dict(tasks, lambda task: task.display_name)
-        transformed_databases = list_to_dict(databases, lambda database: database.db_name)
-        transformed_subs = list_to_dict(subs, lambda sub: sub.id)
-        if self.upgrade_rpc and upgrade_request:
-            transformed_upgrade_request = list_to_dict(upgrade_request, lambda request: request.db_uuid)
-        new_tasks: List[Task] = []
-        for key, task in transformed_tasks.items():
-            if transformed_databases.get(key) or not self.hide_not_found:
-                task.database = transformed_databases.get(key, Database())
-                task.database.subscription = transformed_subs.get(task.database.subscription_id, Subscription())
-                if self.upgrade_rpc and upgrade_request:
-                    task.database.upgrade_request = transformed_upgrade_request.get(
-                        task.database.db_uuid, UpgradeRequest()
-                    )
-                new_tasks.append(task)
-        return new_tasks
-
-    def _transform_to_rows(self, tasks: List[Task]) -> List[Any]:
-        new_rows = [task.get_clean_row(self.odoo_url) for task in tasks]
-        return new_rows if not self.lucky else [random.choice(new_rows)]
-
-    def _display_task_list(self, rows: List[Any]) -> List[List[TableHeader] | List[dict]]:
+    ) -> RecordBatch:
+        batch = self._get_task_batch(tasks)
+        database_batch = self._get_database_batch(databases)
+        positions = batch.lookup("key", database_batch, "key")
+        batch = batch.with_column("found", array("b", (position != MISSING for position in positions))).gather(
+            database_batch,
+            positions,
+            {name: name for name in ("version", "db_uuid", "parent", "subscription_id", "date_valid")},
+            {"version": "NO VERSION", "db_uuid": ""},
+        )
+        batch = self._filter_batch(batch)
+
+        sub_batch = RecordBatch.from_records(
+            subs,
+            {
+                "id": ("q", lambda sub: sub.id),
+                "client_order_ref": (None, lambda sub: sub.client_order_ref),
+            },
+        )
+        batch = batch.gather(sub_batch, batch.lookup("subscription_id", sub_batch, "id"), {"client_order_ref": "sub"})
+
+        if self.upgrade_rpc:
+            request_batch = RecordBatch.from_records(
+                upgrade_request or [],
+                {
+                    "db_uuid": (None, lambda request: request.db_uuid),
+                    "traceback": self._traceback_column(),
+                },
+            )
+            positions = batch.lookup("db_uuid", request_batch, "db_uuid")
+            batch = batch.gather(request_batch, positions, {"traceback": "traceback"})
+        return batch
+
+    def _traceback_column(self) -> Tuple[Optional[str], Callable[[UpgradeRequest], Any]]:
+        if self.traceback_length:
+            return None, lambda request: request.last_traceback or ""
+        return "b", lambda request: bool(request.last_traceback)
+
+    def _format_date(self, timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp).strftime("%d-%m-%Y") if not isnan(timestamp) else ""
+
+    def _transform_to_rows(self, batch: RecordBatch) -> List[Any]:
+        if self.lucky and len(batch):
+            batch = batch.take([random.randrange(len(batch))])
+        columns = ["name", "version", "sub", "subscription_id", "parent", "date_valid", "id"]
+        if self.upgrade_rpc:
+            columns.append("traceback")
+        rows = []
+        for name, version, sub, subscription_id, parent, date_valid, task_id, *traceback in batch.rows(columns):
+            row = [
+                name,
+                version,
+                str(BoolStr(sub, self.show_sub)) if self.show_sub else yes_or_no_value(subscription_id),
+                yes_or_no_value(parent),
+                self._format_date(date_valid),
+                f"{self.odoo_url}/odoo/my-tasks/{task_id}",
+            ]
+            if traceback:
+                row.insert(4, (traceback[0] or "") if self.traceback_length else yes_or_no_value(traceback[0]))
+            rows.append(row)
+        return rows
+
+    def _get_link_width(self, task_ids: Sequence[int]) -> int:
+        # links only differ by the task id, no need to measure every row
+        return len(f"{self.odoo_url}/odoo/my-tasks/{max(task_ids)}") if len(task_ids) else 0
+
+    def _truncate_name(self, name: str, width: int) -> str:
+        return name if len(name) <= width else name[: width - 1] + "…"
+
+    def _display_task_list(
+        self, rows: List[Any], link_width: int = 0, name_width: int = 0
+    ) -> List[List[TableHeader] | List[dict]]:
+        if name_width:
+            rows = [[self._truncate_name(row[0], name_width), *row[1:]] for row in rows]
         titles = [
-            TableHeader("Task Name"),
-            TableHeader("Version"),
+            TableHeader("Task Name", min_width=name_width),
+            TableHeader("Version", min_width=len("NO VERSION")),
             TableHeader("Sub"),
             TableHeader("Parent"),
-            TableHeader("Exp Date"),
+            TableHeader("Exp Date", min_width=len("dd-mm-yyyy")),
             TableHeader(
                 "Link",
-                min_width=max(len(row[-1]) for row in rows) if len(rows) else 0,
+                min_width=link_width,
                 style="bold color.purple",
             ),
         ]
@@ -122,42 +316,56 @@ class TitleStrategy(Strategy):
             titles.insert(4, TableHeader("Traceback"))
         return [titles, rows]
 
-    def search(self) -> List[List[TableHeader] | List[dict]]:
+    def _prepare_tasks(self, tasks: List[Task]) -> List[Task]:
+        # To be able to complete fetched tasks before searching their databases
+        return tasks
+
+    def _get_task_service(self, task_service: Optional[TaskService] = None) -> TaskService:
+        task_service = task_service or self.task_service
         if self.show_sub:
-            self.task_service.with_sub()
+            task_service = task_service.with_sub()
         if self.upgrade_rpc:
-            self.task_service.with_upgrade_mode()
-        tasks: List[Task] = (
-            self.task_service.with_fields(self._task_fields())
+            task_service = task_service.with_upgrade_mode()
+        return (
+            task_service.with_required_fields(self._get_field_flags())
             .with_domain(self._get_tasks_domain())
             .with_limit(self.limit)
-            .fetch()
         )
-        databases: List[Database] = (
-            self.database_service.with_fields(
-                [
-                    "subscription_id",
-                    "version",
-                    "url",
-                    "extra_apps",
-                    "db_name",
-                    "db_uuid",
-                    "parent_id",
-                    "date_valid",
-                ]
-            )
+
+    def _fetch_tasks(self) -> List[Task]:
+        return self._prepare_tasks(self._get_task_service().fetch())
+
+    def _fetch_databases(self, tasks: List[Task]) -> List[Database]:
+        if not tasks:
+            return []
+        return (
+            self.database_service.with_required_fields(self._get_field_flags())
+            # the top databases must be counted after the filters, by the server
+            .with_local_fields([] if self.top else DATABASE_LOCAL_FIELDS)
             .with_domain(self._get_databases_domain(tasks))
-            .with_limit(self.limit)
-            .fetch()
+            .with_limit(self.top or self.limit)
+            .fetch(**({"order": VALIDITY_ORDER} if self.order_by_validity else {}))
         )
-        subscriptions: List[Subscription] = (
-            self.sale_order_service.with_fields(["client_order_ref"])
+
+    def _fetch_subscriptions(self, databases: List[Database]) -> List[Subscription]:
+        if not any(database.subscription_id for database in databases):
+            return []
+        return (
+            self.sale_order_service.with_required_fields(self._get_field_flags())
             .with_domain(self._get_subscription_domain(databases))
             .with_limit(self.limit)
             .fetch()
         )
-        upgrade_requests: Optional[List[UpgradeRequest]] = (
-            self.upgrade_request_service.with_fields(["db_uuid", "last_traceback"])
+
+    def _with_traceback(self, service: UpgradeRequestService) -> UpgradeRequestService:
+        return service.with_traceback(self.traceback_length) if self.traceback_length else service
+
+    def _fetch_upgrade_requests(self, databases: List[Database]) -> Optional[List[UpgradeRequest]]:
+        if self.upgrade_rpc and not any(database.db_uuid for database in databases):
+            return []
+        return (
+            self._with_traceback(self.upgrade_request_service)
+            .with_required_fields(self._get_field_flags())
             .with_domain(self._get_upgrade_request_domain(databases))
             .with_limit(self.limit)
             .fetch()
@@ -165,26 +373,233 @@ class TitleStrategy(Strategy):
             else None
         )
 
-        tasks_merged: List[Task] = self._merge_records(tasks, databases, subscriptions, upgrade_requests)
+    def _planned_fields(self, service: Service) -> List[str]:
+        return ["id", *required_fields(getattr(service.model_class, "_required_fields", {}), self._get_field_flags())]
 
-        if self.order_by_validity:
-            tasks_merged = self._get_ordered_tasks(tasks_merged)
+    def plan_search(self, tasks: Optional[List[Task]] = None) -> SearchPlan:
+        # subscriptions and upgrade requests only depend on databases and hit different servers
+        plan = SearchPlan()
+        if tasks is None:
+            plan.add("tasks", self._fetch_tasks, model=TaskService.model_name, fields=self._planned_fields(TaskService))
+        else:
+            plan.add("tasks", lambda: tasks)
+        plan.add(
+            "databases",
+            self._fetch_databases,
+            ["tasks"],
+            DatabaseService.model_name,
+            self._planned_fields(DatabaseService),
+        )
+        if self.show_sub:
+            plan.add(
+                "subscriptions",
+                self._fetch_subscriptions,
+                ["databases"],
+                SaleOrderService.model_name,
+                self._planned_fields(SaleOrderService),
+            )
+        else:
+            # the Sub column and --contract only need subscription_id on the databases
+            plan.skip("subscriptions", "no --explicit, subscription_id is enough", [])
+        if self.upgrade_rpc:
+            plan.add(
+                "upgrade_requests",
+                self._fetch_upgrade_requests,
+                ["databases"],
+                UpgradeRequestService.model_name,
+                self._planned_fields(UpgradeRequestService),
+            )
+        else:
+            plan.skip("upgrade_requests", "no --upgrade")
+        return plan
+
+    def _search_rows(self, plan: SearchPlan) -> RecordBatch:
+        stages = plan.run(self._get_scheduler())
+        with profile_stage(self.profiler, "merge"):
+            tasks_merged: RecordBatch = self._merge_records(
+                self._get_tasks_by_databases(stages["tasks"], stages["databases"])
+                if self.order_by_validity
+                else stages["tasks"],
+                stages["databases"],
+                stages["subscriptions"],
+                stages["upgrade_requests"],
+            )
+            if self.order_by_validity:
+                tasks_merged = self._get_ordered_tasks(tasks_merged)
+        if self.task_names:
+            # the tickets found, even when their database is filtered out
+            self._match_task_names(task.name for task in stages["tasks"])
+        return tasks_merged
+
+    def _sample_lucky(self) -> RecordBatch:
+        # random windows of tasks, enriched one after the other until one of them keeps a row
+        task_service = self._get_task_service(self._get_fresh_service(TaskService))
+        total = task_service.count()
+        if self.limit:
+            total = min(total, self.limit)
+        windows = ceil(total / LUCKY_WINDOW)
+        tasks_merged = self._merge_records([], [], [])
+        for window in random.sample(range(windows), windows):
+            tasks = task_service.with_limit(LUCKY_WINDOW).fetch(offset=window * LUCKY_WINDOW, order="id")
+            tasks_merged = self._search_rows(self.plan_search(self._prepare_tasks(tasks)))
+            if len(tasks_merged):
+                break
+        return tasks_merged
+
+    def search(self) -> List[List[TableHeader] | List[dict]]:
+        # with --top the candidates are already few, no need to sample them
+        lucky = self.lucky and not self.top
+        tasks_merged = self._sample_lucky() if lucky else self._search_rows(self.plan_search())
+        with profile_stage(self.profiler, "rows"):
+            rows: List[dict] = self._transform_to_rows(tasks_merged)
+            return self._display_task_list(rows, self._get_link_width(tasks_merged["id"]))
 
-        rows: List[dict] = self._transform_to_rows(tasks_merged)
+    def search_stream(
+        self, page_size: int = 50, fixed_widths: bool = True
+    ) -> Iterator[List[List[TableHeader] | List[dict]]]:
+        # ordering and lucky need every row before showing anything
+        if self.order_by_validity or self.lucky:
+            yield self.search()
+            return
 
-        return self._display_task_list(rows)
+        task_service = self._get_task_service()
+        link_width = name_width = 0
+        if fixed_widths:
+            # pages come by increasing id, the last task matching gives the widest link
+            link_width = self._get_link_width(task_service.with_limit(1).fetch_ids(order="id desc"))
+            name_width = TASK_NAME_WIDTH
+        for tasks in task_service.fetch_pages(page_size, plan=False):
+            tasks_merged = self._search_rows(self.plan_search(self._prepare_tasks(tasks)))
+            yield self._display_task_list(self._transform_to_rows(tasks_merged), link_width, name_width)
 
-    def _get_ordered_tasks(self, tasks: List[Task]) -> List[Task]:
-        tasks = sorted(
-            tasks,
-            key=lambda task: task.database.date_valid.timestamp()
-            if task.database and task.database.date_valid and isinstance(task.database.date_valid, datetime)
-            else float("-inf"),
+    # --- Watch --------------------------------------------------------------
+
+    def _get_fresh_service(self, service_class: Type[Service], rpc: Optional[RpcConnector] = None) -> Service:
+        # uncached service, for the queries which must see the current data of the server
+        return (
+            service_class(rpc or self.odoo_rpc)
+            .set_profiler(self.profiler)
+            .set_page_size(self.page_size)
+            .set_chunk_size(self.chunk_size)
+            .with_limit(None)
+        )
+
+    def _get_matching_ids(self, service: Service, ids: Sequence[int]) -> Set[int]:
+        # the known records still in the domain of service: deleted, archived or filtered out ones are not
+        if not ids:
+            return set()
+        return set(service.with_domain([["id", "in", list(ids)]]).fetch_ids())
+
+    def _watch_tasks(self, state: WatchState, since: str) -> List[Task]:
+        # tasks written since the last tick, the known ones no longer in the domain are dropped
+        task_service = self._get_task_service(self._get_fresh_service(TaskService))
+        changed = self._prepare_tasks(task_service.with_domain([["write_date", ">=", since]]).fetch())
+        matching = self._get_matching_ids(task_service, list(state.tasks))
+        for task_id in set(state.tasks) - matching:
+            del state.tasks[task_id]
+        state.tasks.update((task.id, task) for task in changed)
+        return changed
+
+    def _get_database_watch_service(self, flags: Set[str]) -> DatabaseService:
+        return (
+            self._get_fresh_service(DatabaseService)
+            .with_required_fields(flags)
+            .with_local_fields(DATABASE_LOCAL_FIELDS)
         )
-        return tasks
 
-    def _clean_stats(self, datalist: List[dict], union_wrapper: Callable | None):
-        return datalist if not callable(union_wrapper) else union_wrapper(datalist)
+    def _watch_databases(self, state: WatchState, since: str, changed_tasks: List[Task]) -> List[Database]:
+        # a changed task can point to other databases, all of them are read again
+        flags = self._get_field_flags()
+        changed: List[Database] = []
+        changed_ids = {task.id for task in changed_tasks}
+        if old_tasks := [task for task in state.tasks.values() if task.id not in changed_ids]:
+            domain = AND([self._get_databases_domain(old_tasks), [["write_date", ">=", since]]])
+            changed += self._get_database_watch_service(flags).with_domain(domain).fetch()
+        if changed_tasks:
+            domain = self._get_databases_domain(changed_tasks)
+            changed += self._get_database_watch_service(flags).with_domain(domain).fetch()
+        # e.g. the databases which did not ping for too long, or of a dropped task
+        domain = self._get_databases_domain(list(state.tasks.values()))
+        matching = self._get_matching_ids(
+            self._get_fresh_service(DatabaseService).with_domain(domain), list(state.databases)
+        )
+        for database_id in set(state.databases) - matching:
+            del state.databases[database_id]
+        state.databases.update((database.id, database) for database in changed)
+        return changed
+
+    def _watch_tick(self, state: WatchState, since: str) -> None:
+        changed_tasks = self._watch_tasks(state, since)
+        databases = self._watch_databases(state, since, changed_tasks)
+        flags = self._get_field_flags()
+        missing = [
+            database
+            for database in databases
+            if database.subscription_id and database.subscription_id not in state.subscriptions
+        ]
+        if self.show_sub:
+            # the new subscriptions, and the known ones written since the last tick
+            sale_order_service = self._get_fresh_service(SaleOrderService).with_required_fields(flags)
+            subscriptions = []
+            if missing:
+                subscriptions += sale_order_service.with_domain(self._get_subscription_domain(missing)).fetch()
+            if state.subscriptions:
+                domain = [["id", "in", list(state.subscriptions)], ["write_date", ">=", since]]
+                subscriptions += sale_order_service.with_domain(domain).fetch()
+            state.subscriptions.update((sub.id, sub) for sub in subscriptions)
+        if self.upgrade_rpc and databases:
+            domain = self._get_upgrade_request_domain(databases)
+            requests = (
+                self._with_traceback(self._get_fresh_service(UpgradeRequestService, self.upgrade_rpc))
+                .with_required_fields(flags)
+                .with_domain(domain)
+                .fetch()
+            )
+            state.upgrade_requests.update((request.db_uuid, request) for request in requests)
+
+    def _watch_rows(self, state: WatchState) -> Dict[int, List[Any]]:
+        batch = self._merge_records(
+            list(state.tasks.values()),
+            list(state.databases.values()),
+            list(state.subscriptions.values()),
+            list(state.upgrade_requests.values()),
+        )
+        if self.order_by_validity:
+            batch = self._get_ordered_tasks(batch)
+        return dict(zip(batch["id"], self._transform_to_rows(batch)))
+
+    def watch(self, interval: int) -> Iterator[List[List[TableHeader] | List[dict]]]:
+        # every row first, then at each tick only the rows added, removed or changed
+        self.lucky = False
+        # the first rows must be as recent as the cursor, a cached response can be a ttl older
+        self.without_cache()
+        state = WatchState()
+        stages = self.plan_search().run(self._get_scheduler())
+        state.tasks = {task.id: task for task in stages["tasks"]}
+        state.databases = {database.id: database for database in stages["databases"]}
+        state.subscriptions = {sub.id: sub for sub in stages["subscriptions"]}
+        state.upgrade_requests = {request.db_uuid: request for request in stages["upgrade_requests"] or []}
+        state.update_rows(self._watch_rows(state))
+        link_width = self._get_link_width(list(state.tasks)) + LINK_ID_MARGIN
+        yield self._display_task_list(list(state.rows.values()), link_width, TASK_NAME_WIDTH)
+
+        while True:
+            time.sleep(interval)
+            since, state.since = state.since, watch_cursor()
+            self._watch_tick(state, since)
+            changes = state.update_rows(self._watch_rows(state))
+            titles, rows = self._display_task_list([row for _, row in changes], link_width, TASK_NAME_WIDTH)
+            yield [[TableHeader("Change"), *titles], [[change, *row] for (change, _), row in zip(changes, rows)]]
+
+    def _get_ordered_tasks(self, batch: RecordBatch) -> RecordBatch:
+        # search and watch show the same order: tasks without a date first, then by date and id
+        return batch.sort("id").sort("date_valid")
+
+    def _get_tasks_by_databases(self, tasks: List[Task], databases: List[Database]) -> List[Task]:
+        # databases come ordered by validity (without a date last), with --top only their tasks are kept
+        tasks_by_key = list_to_dict(tasks, self._task_key)
+        ordered = [tasks_by_key.pop(key) for key in map(self._database_key, databases) if key in tasks_by_key]
+        return ordered if self.top else ordered + list(tasks_by_key.values())
 
     def _display_stats_list(self, rows: List[dict], group_title: str) -> List[List[TableHeader] | List[dict]]:
         titles = [
@@ -193,19 +608,63 @@ class TitleStrategy(Strategy):
         ]
         return [titles, [[str(row.get(group_title, "")), str(row.get("__count", ""))] for row in rows]]
 
-    def stats(self, group_by: List[str], union_wrapper: Optional[Callable]) -> List[List[Any]]:
-        tasks: Task = (
-            self.task_service.with_fields(self._task_fields())
-            .with_domain(self._get_tasks_domain())
-            .with_limit(self.limit)
-            .fetch()
-        )
-        response = (
+    def _display_crosstab(
+        self, row_title: str, column_title: str, columns: List[Any], rows: List[List[Any]]
+    ) -> List[List[TableHeader] | List[dict]]:
+        titles = [
+            TableHeader(row_title),
+            *[TableHeader(f"{column_title} {column}") for column in columns],
+            TableHeader("Count", style="bold color.purple"),
+        ]
+        return [titles, [[str(cell) for cell in row] for row in rows]]
+
+    def _get_stats_dimensions(self) -> List[Tuple[str, Optional[Callable]]]:
+        return [
+            ("version", None),
+            ("parent_id", lambda rows: group_by_record_exists(rows, "parent_id")),
+            ("subscription_id", lambda rows: group_by_record_exists(rows, "subscription_id")),
+        ]
+
+    def _fetch_stats_pivot(self, tasks: List[Task]) -> Pivot:
+        dimensions = [dimension for dimension, _ in self._get_stats_dimensions()]
+        groups = (
             self.database_service.with_domain(self._get_databases_domain(tasks))
-            .with_limit(self.limit)
-            .fetch_group(group_by, union_wrapper)
+            .with_limit(None)
+            .fetch_group(dimensions, lazy=False)
         )
-        return self._display_stats_list(
-            response,
-            group_by[0],
+        return Pivot(groups, dimensions)
+
+    def _fetch_upgrade_stats(self, databases: List[Database]) -> List[dict]:
+        db_uuids = [database.db_uuid for database in databases if database.db_uuid]
+        return (
+            self.upgrade_request_service.with_domain([["db_uuid", "in", db_uuids], ["active", "in", [True, False]]])
+            .with_limit(None)
+            .fetch_group(["state"])
+        )
+
+    def _get_stats_scheduler(self) -> StageScheduler:
+        scheduler = (
+            self._get_scheduler()
+            .add_stage("tasks", self._fetch_tasks)
+            .add_stage("pivot", self._fetch_stats_pivot, ["tasks"])
         )
+        if self.upgrade_rpc:
+            # same query as the search, answered from its cache
+            scheduler.add_stage("databases", self._fetch_databases, ["tasks"])
+            scheduler.add_stage("upgrade", self._fetch_upgrade_stats, ["databases"])
+        return scheduler
+
+    def stats(self) -> List[List[List[TableHeader] | List[dict]]]:
+        stages = self._get_stats_scheduler().run()
+        pivot: Pivot = stages["pivot"]
+        with profile_stage(self.profiler, "tables"):
+            tables = [
+                self._display_stats_list(pivot.marginal(dimension, union_wrapper), dimension)
+                for dimension, union_wrapper in self._get_stats_dimensions()
+            ]
+            for dimension in ("parent_id", "subscription_id"):
+                columns, rows = pivot.crosstab("version", dimension, lambda value: yes_or_no_value(bool(value)))
+                tables.append(self._display_crosstab("version", dimension, columns, rows))
+            if "upgrade" in stages:
+                tables.append(self._display_stats_list(stages["upgrade"], "state"))
+        return tables
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from odev.plugins.odev_rolling_release.api.dtos.Database import Database
+from odev.plugins.odev_rolling_release.api.dtos.Subscription import Subscription
+from odev.plugins.odev_rolling_release.api.dtos.Task import Task
+from odev.plugins.odev_rolling_release.api.dtos.UpgradeRequest import UpgradeRequest
+
+
+# write_date is stored in UTC by the server, ticks overlap a bit to absorb clock skews
+WATCH_MARGIN = timedelta(minutes=1)
+
+ADDED = "+"
+REMOVED = "-"
+CHANGED = "~"
+
+
+def watch_cursor() -> str:
+    return (datetime.utcnow() - WATCH_MARGIN).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class WatchState:
+    # Records of the last tick by id, updated with the records changed since then.
+
+    tasks: Dict[int, Task]
+    databases: Dict[int, Database]
+    subscriptions: Dict[int, Subscription]
+    upgrade_requests: Dict[str, UpgradeRequest]
+    rows: Dict[int, List[Any]]
+    since: str
+
+    def __init__(self):
+        self.tasks = {}
+        self.databases = {}
+        self.subscriptions = {}
+        self.upgrade_requests = {}
+        self.rows = {}
+        # taken before querying so that nothing written meanwhile is missed
+        self.since = watch_cursor()
+
+    def update_rows(self, rows: Dict[int, List[Any]]) -> List[Tuple[str, List[Any]]]:
+        # (change, row) of the rows added, removed or changed, in the order of the new rows
+        changes = [
+            (ADDED if task_id not in self.rows else CHANGED, row)
+            for task_id, row in rows.items()
+            if self.rows.get(task_id) != row
+        ]
+        changes += [(REMOVED, row) for task_id, row in self.rows.items() if task_id not in rows]
+        self.rows = rows
+        return changes
@@ -0,0 +1,99 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+
+VERSIONS = ["15.0", "16.0", "saas~16.4", "17.0", "saas~17.2", "18.0"]
+UPGRADE_STATES = ["draft", "pending", "done", "failed"]
+
+TASK_STAGE = [25525, "Rolling Release"]
+TASK_TAG = [25106, "rr"]
+
+
+def _format_datetime(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate_dataset(size: int, seed: int = 0) -> Dict[str, List[dict]]:
+    """Synthetic records of the models read by rr, as search_read returns them.
+    About 90% of the tasks have a database, half of the databases a parent,
+    60% a subscription and each database has up to three upgrade requests.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    tasks: List[dict] = []
+    databases: List[dict] = []
+    sale_orders: List[dict] = []
+    upgrade_requests: List[dict] = []
+
+    for index in range(1, size + 1):
+        db_name = f"rr-bench-{index}"
+        url = f"https://{db_name}.odoo.com"
+        tasks.append(
+            {
+                "id": index,
+                "name": f"[rr] {db_name}",
+                "description": f'<p>Database: <a href="{url}/_odoo/support">{db_name}</a></p>' + "<p>lorem</p>" * 20,
+                "write_date": _format_datetime(now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))),
+                "user_ids": [],
+                "stage_id": TASK_STAGE,
+                "tag_ids": [TASK_TAG[0]],
+            }
+        )
+        if rng.random() > 0.9:
+            continue
+
+        subscription_id = False
+        if rng.random() < 0.6:
+            sale_order_id = len(sale_orders) + 1
+            sale_orders.append(
+                {
+                    "id": sale_order_id,
+                    "name": f"SO{sale_order_id:05d}",
+                    "client_order_ref": f"REF{index}",
+                    # watched subscriptions are polled on it
+                    "write_date": _format_datetime(now - timedelta(days=30)),
+                }
+            )
+            subscription_id = [sale_order_id, f"SO{sale_order_id:05d}"]
+
+        parent_id = False
+        if databases and rng.random() < 0.5:
+            parent = rng.choice(databases)
+            parent_id = [parent["id"], parent["db_name"]]
+
+        db_uuid = f"{rng.getrandbits(128):032x}"
+        databases.append(
+            {
+                "id": index,
+                "db_name": db_name,
+                "url": url,
+                "version": rng.choice(VERSIONS),
+                "db_uuid": db_uuid,
+                "parent_id": parent_id,
+                "subscription_id": subscription_id,
+                "date_valid": _format_datetime(now + timedelta(days=rng.randint(-30, 365))),
+                "last_ping": _format_datetime(now - timedelta(days=rng.randint(0, 40))),
+                "write_date": _format_datetime(now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))),
+                "extra_apps": False,
+            }
+        )
+
+        for _ in range(rng.randint(0, 3)):
+            failed = rng.random() < 0.3
+            upgrade_requests.append(
+                {
+                    "id": len(upgrade_requests) + 1,
+                    "db_uuid": db_uuid,
+                    "active": True,
+                    "state": "failed" if failed else rng.choice(UPGRADE_STATES[:3]),
+                    "last_traceback": "Traceback (most recent call last):\n" + "  File ...\n" * 50 if failed else False,
+                }
+            )
+
+    return {
+        "project.task": tasks,
+        "openerp.enterprise.database": databases,
+        "sale.order": sale_orders,
+        "upgrade.request": upgrade_requests,
+    }
@@ -0,0 +1,143 @@
+import threading
+import time
+import tracemalloc
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+from odev.plugins.odev_rolling_release.api.connections import ConnectionManager
+from odev.plugins.odev_rolling_release.api.strategy.bs4_strategy import Bs4Strategy
+from odev.plugins.odev_rolling_release.api.strategy.title_strategy import TitleStrategy
+from odev.plugins.odev_rolling_release.benchmark.server import FakeOdooServer
+
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+BENCH_URL = "bench.odoo.test"
+BENCH_UPGRADE_URL = "upgrade.bench.odoo.test"
+BENCH_DATABASE = "bench"
+BENCH_TASK_DOMAIN = [["name", "ilike", "[rr]%"]]
+
+
+class TrafficCounter:
+    """Round trips and payload bytes of the requests sent through an httpx client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.round_trips = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    def on_request(self, request: "httpx.Request") -> None:
+        with self._lock:
+            self.round_trips += 1
+            self.bytes_sent += len(request.content)
+
+    def on_response(self, response: "httpx.Response") -> None:
+        response.read()
+        with self._lock:
+            self.bytes_received += len(response.content)
+
+
+class BenchmarkResult:
+    __slots__ = ("name", "wall_time", "round_trips", "bytes_sent", "bytes_received", "peak_memory")
+
+    def __init__(self, name: str, wall_time: float, counter: TrafficCounter, peak_memory: int):
+        self.name = name
+        self.wall_time = wall_time
+        self.round_trips = counter.round_trips
+        self.bytes_sent = counter.bytes_sent
+        self.bytes_received = counter.bytes_received
+        self.peak_memory = peak_memory
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Benchmark:
+    """Runs rr strategies end to end against a FakeOdooServer. All the traffic of
+    odoolib is redirected to the local server and measured on the client side.
+    """
+
+    def __init__(
+        self,
+        size: int = 1000,
+        latency: float = 0.0,
+        limit: int = 700,
+        page_size: Optional[int] = 1000,
+        chunk_size: Optional[int] = 200,
+        seed: int = 0,
+    ):
+        if httpx is None:
+            # the traffic is redirected and measured by the hooks of an httpx client
+            raise Exception("The benchmark needs httpx, install it with: pip install httpx")
+        self.server = FakeOdooServer(size, seed, latency)
+        self.limit = limit
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.counter = TrafficCounter()
+        self.scenarios: Dict[str, Callable[[], Any]] = {
+            "title": lambda: self._get_strategy(TitleStrategy).search(),
+            "title_upgrade": lambda: self._get_strategy(TitleStrategy, upgrade=True).search(),
+            "bs4": lambda: self._get_strategy(Bs4Strategy).search(),
+            "stats": lambda: self._get_strategy(TitleStrategy).stats(),
+            "stats_upgrade": lambda: self._get_strategy(TitleStrategy, upgrade=True).stats(),
+        }
+
+    def _redirect(self, request: "httpx.Request") -> None:
+        request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.server.port)
+
+    def _get_client(self) -> "httpx.Client":
+        return httpx.Client(
+            event_hooks={
+                "request": [self._redirect, self.counter.on_request],
+                "response": [self.counter.on_response],
+            }
+        )
+
+    def _get_strategy(self, strategy_class: type, upgrade: bool = False) -> TitleStrategy:
+        strategy = strategy_class(
+            BENCH_TASK_DOMAIN,
+            self.limit,
+            self.connections.get(BENCH_URL, BENCH_DATABASE),
+            self.connections.get(BENCH_UPGRADE_URL, BENCH_DATABASE) if upgrade else None,
+            BENCH_URL,
+        )
+        return strategy.with_page_size(self.page_size).with_chunk_size(self.chunk_size)
+
+    def _measure(self, name: str) -> BenchmarkResult:
+        self.counter.reset()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            self.scenarios[name]()
+            wall_time = time.perf_counter() - start
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return BenchmarkResult(name, wall_time, self.counter, peak_memory)
+
+    def run(self, names: Optional[List[str]] = None, repeat: int = 1) -> List[BenchmarkResult]:
+        names = names or list(self.scenarios)
+        if unknown := set(names) - set(self.scenarios):
+            raise ValueError(f"Unknown benchmark scenarios: {', '.join(sorted(unknown))}")
+
+        results = []
+        with self.server, ConnectionManager(client=self._get_client()) as self.connections:
+            # log in once so that every scenario is measured with warm connections
+            self._measure(names[0])
+            for name in names:
+                results.extend(self._measure(name) for _ in range(repeat))
+        return results
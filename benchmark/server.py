@@ -0,0 +1,158 @@
+import json
+import multiprocessing
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from odev.plugins.odev_rolling_release.benchmark.dataset import generate_dataset
+from odev.plugins.odev_rolling_release.utils.osv import filter_records
+
+
+USER_ID = 2
+
+
+def _hashable(value: Any) -> Hashable:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _order_key(value: Any) -> Tuple[bool, Any]:
+    # odoo stores False as NULL: last ascending and first descending, like postgres
+    return (True, 0) if value is False or value is None else (False, value)
+
+
+class FakeOdoo:
+    """The ORM methods used by rr, over an in-memory dataset."""
+
+    def __init__(self, records: Dict[str, List[dict]]):
+        self.records = records
+
+    def _search(self, model: str, domain: List[Any], offset: int = 0, limit: Optional[int] = None, order=None):
+        records = filter_records(domain or [], self.records.get(model, []))
+        for part in reversed((order or "id").split(",")):
+            field, _, direction = part.strip().partition(" ")
+            records.sort(
+                key=lambda record: _order_key(record.get(field)),
+                reverse=direction.lower() == "desc",
+            )
+        return records[offset : offset + limit if limit else None]
+
+    def search_read(self, model, domain=None, fields=None, offset=0, limit=None, order=None, **kwargs):
+        records = self._search(model, domain, offset, limit, order)
+        fields = (fields or []) + ["id"]
+        return [{field: record.get(field, False) for field in fields} for record in records]
+
+    def search_count(self, model, domain=None, **kwargs):
+        return len(self._search(model, domain))
+
+    def read_group(self, model, domain=None, fields=None, groupby=None, offset=0, limit=None, lazy=True, **kwargs):
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby or [])
+        groupby = groupby[:1] if lazy else groupby
+        groups: Dict[Tuple[Hashable, ...], List[dict]] = defaultdict(list)
+        for record in self._search(model, domain):
+            groups[tuple(_hashable(record.get(field, False)) for field in groupby)].append(record)
+
+        result = []
+        for key, records in groups.items():
+            group = {field: list(value) if isinstance(value, tuple) else value for field, value in zip(groupby, key)}
+            group["__count"] = len(records)
+            for spec in fields or []:
+                name, _, aggregate = spec.partition(":")
+                if aggregate in ("max", "min") and name not in groupby:
+                    group[name] = (max if aggregate == "max" else min)(record.get(name) for record in records)
+            result.append(group)
+        return result[offset : offset + limit if limit else None]
+
+    def execute_kw(self, model: str, method: str, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+        if method not in ("search_read", "search_count", "read_group"):
+            raise ValueError(f"Method {method} is not implemented by the fake server")
+        return getattr(self, method)(model, *args, **kwargs)
+
+
+class FakeOdooHandler(BaseHTTPRequestHandler):
+    odoo: FakeOdoo
+    latency: float = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, service: str, method: str, args: List[Any]) -> Any:
+        if service == "common" and method in ("login", "authenticate"):
+            return USER_ID
+        if service == "common" and method == "version":
+            return {"server_version": "17.0", "server_version_info": [17, 0, 0, "final", 0, ""]}
+        if service == "db" and method == "list":
+            return ["bench"]
+        if service == "object" and method == "execute_kw":
+            _database, _uid, _password, model, model_method, model_args, *model_kwargs = args
+            return self.odoo.execute_kw(model, model_method, model_args, model_kwargs[0] if model_kwargs else {})
+        if service == "object" and method == "execute":
+            _database, _uid, _password, model, model_method, *model_args = args
+            return self.odoo.execute_kw(model, model_method, model_args, {})
+        raise ValueError(f"{service}.{method} is not implemented by the fake server")
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        params = request.get("params", {})
+        time.sleep(self.latency)
+        try:
+            response = {"result": self._dispatch(params.get("service"), params.get("method"), params.get("args", []))}
+        except Exception as error:
+            response = {"error": {"code": 200, "message": str(error), "data": {"name": type(error).__name__}}}
+        body = json.dumps({"jsonrpc": "2.0", "id": request.get("id"), **response}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(size: int, seed: int, latency: float, ready: Any) -> None:
+    handler = type("Handler", (FakeOdooHandler,), {"odoo": FakeOdoo(generate_dataset(size, seed)), "latency": latency})
+    with ThreadingHTTPServer(("127.0.0.1", 0), handler) as server:
+        ready.send(server.server_address[1])
+        server.serve_forever()
+
+
+class FakeOdooServer:
+    """Local JSON-RPC server answering like Odoo on synthetic data, in its own
+    process so that it does not count in the memory and time of the client.
+    """
+
+    def __init__(self, size: int = 1000, seed: int = 0, latency: float = 0.0):
+        self.size = size
+        self.seed = seed
+        self.latency = latency
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "FakeOdooServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=serve, args=(self.size, self.seed, self.latency, sender), daemon=True
+        )
+        self._process.start()
+        if not receiver.poll(60):
+            self.stop()
+            raise RuntimeError("The fake Odoo server did not start")
+        self.port = receiver.recv()
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
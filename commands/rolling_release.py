@@ -1,13 +1,20 @@
+import sys
+from typing import List, Optional
+
 from odev.common import args, progress
 from odev.common.commands import Command
 from odev.common.connectors.rpc import RpcConnector
-from odev.common.databases.remote import RemoteDatabase
+from odev.common.console import TableHeader
 from odev.common.logging import logging
 
+from odev.plugins.odev_rolling_release.api.connections import ConnectionManager
 from odev.plugins.odev_rolling_release.api.strategy.bs4_strategy import Bs4Strategy
+from odev.plugins.odev_rolling_release.api.strategy.mirror_strategy import MirrorStrategy
 from odev.plugins.odev_rolling_release.api.strategy.strategy_abstract import Strategy
 from odev.plugins.odev_rolling_release.api.strategy.title_strategy import TitleStrategy
-from odev.plugins.odev_rolling_release.utils.utils import TripleFlag, group_by_record_exists
+from odev.plugins.odev_rolling_release.utils.export import EXPORT_FORMATS, TableExporter
+from odev.plugins.odev_rolling_release.utils.profiler import Profiler, profile_stage
+from odev.plugins.odev_rolling_release.utils.utils import TripleFlag
 
 
 logger = logging.getLogger(__name__)
@@ -18,11 +25,19 @@ class RollingRelease(Command):
     _name = "rolling-release"
     _aliases = ["rr"]
     rolling_strategy: Strategy
+    connections: ConnectionManager
+    profiler: Optional[Profiler] = None
 
     task_name = args.String(
         name="task",
         aliases=["-t", "--task"],
-        description="Search task by ilike name.",
+        description="Search task by ilike name, several comma separated names are searched at once.",
+    )
+
+    task_file = args.String(
+        name="task_file",
+        aliases=["-tf", "--task-file"],
+        description="Search tasks by the ilike names listed in this file, one by line, '-' to read them from stdin.",
     )
 
     action_bs4 = args.Flag(
@@ -85,14 +100,90 @@ class RollingRelease(Command):
         description="[EXPERIMENTAL] Upgrade data.",
     )
 
+    traceback_length = args.Integer(
+        name="traceback_length",
+        aliases=["-tl", "--traceback-length"],
+        description="With --upgrade, show the last <traceback_length> characters of the tracebacks instead of YES/NO. "
+        "The full tracebacks are still downloaded, the server cannot truncate them.",
+    )
+
     action_order_by_validity = args.Flag(
         name="order_validity",
         aliases=["-ov", "--order-by-validity"],
         description="[EXPERIMENTAL] Upgrade data.",
     )
 
+    top = args.Integer(
+        name="top",
+        aliases=["-top", "--top"],
+        description="Only show the <top> tickets whose databases expire first, implies --order-by-validity.",
+    )
+
+    action_no_cache = args.Flag(
+        name="no_cache",
+        aliases=["-nca", "--no-cache"],
+        description="Always query the server instead of using cached responses.",
+    )
+
+    action_sync = args.Flag(
+        name="sync",
+        aliases=["-sy", "--sync"],
+        description="Synchronize the local mirror of rr tasks, databases and subscriptions.",
+    )
+
+    action_mirror = args.Flag(
+        name="mirror",
+        aliases=["-m", "--mirror"],
+        description="Search in the local mirror instead of the server, run --sync first to fill it.",
+    )
+
+    action_stream = args.Flag(
+        name="stream",
+        aliases=["-st", "--stream"],
+        description="Show tickets by batches as soon as they are found instead of waiting for all of them.",
+    )
+
+    watch = args.Integer(
+        name="watch",
+        aliases=["-w", "--watch"],
+        description="Poll the server every <interval> seconds and only show the rows which changed.",
+    )
+
+    output = args.String(
+        name="output",
+        aliases=["-out", "--output"],
+        description="Write the result as csv, jsonl or parquet instead of showing a table, page by page.",
+        choices=list(EXPORT_FORMATS),
+    )
+
+    output_file = args.String(
+        name="output_file",
+        aliases=["-of", "--output-file"],
+        description="File written by --output instead of stdout, stats write one file by table next to it.",
+    )
+
+    action_profile = args.Flag(
+        name="profile",
+        aliases=["-pr", "--profile"],
+        description="Show the time spent by stage and by RPC call after the result.",
+    )
+
+    profile_output = args.String(
+        name="profile_output",
+        aliases=["-po", "--profile-output"],
+        description="Append the profile to this file as JSON lines.",
+    )
+
+    action_explain = args.Flag(
+        name="explain",
+        aliases=["-x", "--explain"],
+        description="Show the stages, models and fields the search will query before running it.",
+    )
+
     def _set_strategy(self) -> Strategy:
-        if self.args.bs4:
+        if self.args.sync or self.args.mirror:
+            self.rolling_strategy = MirrorStrategy
+        elif self.args.bs4:
             logger.info("[EXPERIMENTAL] This strategy could give you a different result vs standard one.")
             self.rolling_strategy = Bs4Strategy
         else:
@@ -149,7 +240,7 @@ class RollingRelease(Command):
                 func(TripleFlag.NO)
 
     def _get_rpc_connection(self, url, database) -> RpcConnector:
-        return RpcConnector(RemoteDatabase(url, database))
+        return self.connections.get(url, database)
 
     def _setup_run_conf(self):
         logger.info("Loading Configuration")
@@ -171,44 +262,182 @@ class RollingRelease(Command):
             rr_config.get("odoo_url"),
         )
 
+        if self.args.profile or self.args.profile_output:
+            self.profiler = Profiler()
+            self.rolling.with_profiler(self.profiler)
+        self._set_sizes()
+        if isinstance(self.rolling, MirrorStrategy):
+            self.rolling.with_mirror(self.store.rr_mirror)
+        elif not self.args.no_cache:
+            self.rolling.with_cache(self.store.rr_cache, rr_config.get("odoo_cache_ttl"))
+        if isinstance(self.rolling, Bs4Strategy):
+            self.rolling.with_url_store(self.store.rr_task_url)
+
         self._set_double_configs()
         self._set_single_configs()
+        if self.args.traceback_length:
+            self.rolling.with_traceback_length(self.args.traceback_length)
+        if self.args.top:
+            logger.info(f"Only the {self.args.top} databases expiring first")
+            self.rolling.with_top(self.args.top)
 
-        if task := self.args.task:
-            logger.info(f"Searching by name: {task}")
-            self.rolling.task_name = task
+        if task_names := self._get_task_names():
+            logger.info(f"Searching by name: {', '.join(task_names)}")
+            self.rolling.with_task_names(task_names)
+
+    def _get_task_names(self) -> List[str]:
+        task_names = self.args.task.split(",") if self.args.task else []
+        if path := self.args.task_file:
+            if path == "-":
+                task_names.extend(sys.stdin.read().splitlines())
+            else:
+                with open(path) as file:
+                    task_names.extend(file.read().splitlines())
+        # same order, without blanks nor duplicates
+        return list(dict.fromkeys(name.strip() for name in task_names if name.strip()))
+
+    def _log_unmatched_task_names(self):
+        if unmatched := self.rolling.unmatched_task_names():
+            logger.warning(f"No rr ticket found for {len(unmatched)} names: {', '.join(unmatched)}")
 
     def run(self):
-        self._setup_run_conf()
-        if self.args.stats:
-            self.list_all_stats()
-        else:
-            self.list_databases()
+        session_ttl = self.store.rr_config.get("odoo_session_ttl")
+        with ConnectionManager(self.store.rr_session, session_ttl) as self.connections:
+            self._setup_run_conf()
+            if self.args.sync:
+                self.sync_mirror()
+            elif self.args.stats:
+                self.list_all_stats()
+            else:
+                self.list_databases()
+        # lucky only looks at a sample of the tickets
+        if not self.args.sync and not self.args.stats and not self.args.lucky:
+            self._log_unmatched_task_names()
+        if self.profiler:
+            self.show_profile()
+
+    def sync_mirror(self):
+        with progress.spinner("Syncing RR Mirror..."):
+            self.rolling.sync()
+
+    def _set_sizes(self):
+        rr_config = self.store.rr_config
+        self.rolling.with_page_size(rr_config.get("odoo_page_size"))
+        self.rolling.with_chunk_size(rr_config.get("odoo_chunk_size"))
+
+    def watch_databases(self):
+        logger.info(f"Watching rr tickets every {self.args.watch}s, press Ctrl+C to stop")
+        try:
+            for titles, rows in self.rolling.watch(self.args.watch):
+                # an rr-config --set made while watching is used by the next tick
+                if self.store.rr_config.refresh():
+                    self._set_sizes()
+                if not rows:
+                    logger.debug("No change")
+                    continue
+                with profile_stage(self.profiler, "render"):
+                    self.table(titles, rows)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+    def export_databases(self):
+        # pages are written as soon as they are merged, memory is bounded by the page size
+        with TableExporter(self.args.output, self.args.output_file) as exporter:
+            # opened before the first page, an empty result still gets its header and schema
+            writer = exporter.writer([title.title for title in self.rolling.get_titles()])
+            for _, rows in self.rolling.search_stream(self.store.rr_config.get("odoo_page_size"), fixed_widths=False):
+                writer.write_rows(rows)
+
+    def export_stats(self, tables):
+        with TableExporter(self.args.output, self.args.output_file) as exporter:
+            for index, (titles, rows) in enumerate(tables, start=1):
+                exporter.writer([title.title for title in titles], f"{index}_{titles[0].title}").write_rows(rows)
+
+    def report_table(self, title: str, headers: List[TableHeader], rows: List[List[str]]):
+        # diagnostics (plan, profile) printed with an export to stdout would end up in the exported data
+        if not self.args.output or self.args.output_file:
+            logger.info(title)
+            self.table(headers, rows)
+            return
+        lines = [[header.title for header in headers], *rows]
+        widths = [max(len(line[index]) for line in lines) for index in range(len(headers))]
+        text = ["  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip() for line in lines]
+        logger.info("\n".join([title, *text]))
+
+    def explain_search(self):
+        self.report_table(
+            "Search plan",
+            [
+                TableHeader("Stage", style="bold color.purple"),
+                TableHeader("Model"),
+                TableHeader("Depends on"),
+                TableHeader("Fields"),
+            ],
+            [list(row) for row in self.rolling.plan_search().explain_rows()],
+        )
 
     def list_databases(self):
+        if self.args.explain:
+            self.explain_search()
+        if self.args.output:
+            self.export_databases()
+            return
+        if self.args.watch:
+            self.watch_databases()
+            return
+        if self.args.stream:
+            for titles, rows in self.rolling.search_stream():
+                with profile_stage(self.profiler, "render"):
+                    self.table(titles, rows)
+            return
         with progress.spinner("Loading RR Tickets..."):
-            self.table(*self.rolling.search())
+            table = self.rolling.search()
+        with profile_stage(self.profiler, "render"):
+            self.table(*table)
 
     def list_all_stats(self):
         with progress.spinner("Loading RR Stats..."):
-            group_by_list = [
-                ["version", False],
-                [
-                    "parent_id",
-                    lambda x: group_by_record_exists(x, "parent_id"),
-                ],
+            tables = self.rolling.stats()
+        if self.args.output:
+            self.export_stats(tables)
+            return
+        with profile_stage(self.profiler, "render"):
+            for titles, rows in tables:
+                logger.info(f"Stats by {titles[0].title}")
+                self.table(titles, rows)
+
+    def show_profile(self):
+        self.report_table(
+            "Time by stage",
+            [TableHeader("Stage", style="bold color.purple"), TableHeader("Start (s)"), TableHeader("Duration (s)")],
+            [[stage, f"{start:.3f}", f"{duration:.3f}"] for stage, start, duration in self.profiler.stage_rows()],
+        )
+        self.report_table(
+            "RPC calls",
+            [
+                TableHeader("Model", style="bold color.purple"),
+                TableHeader("Method"),
+                TableHeader("Calls"),
+                TableHeader("Total (s)"),
+                TableHeader("Max (s)"),
+                TableHeader("Domain size"),
+                TableHeader("Rows"),
+                TableHeader("KiB"),
+            ],
+            [
                 [
-                    "subscription_id",
-                    lambda x: group_by_record_exists(x, "subscription_id"),
-                ],
-            ]
-            if self.args.upgrade:
-                group_by_list.append(
-                    [
-                        "subscription_id",
-                        lambda x: group_by_record_exists(x, "subscription_id"),
-                    ]
-                )
-            for group_by, wrapper in group_by_list:
-                logger.info(f"Stats by {group_by}")
-                self.table(*self.rolling.stats([group_by], wrapper))
+                    model,
+                    method,
+                    str(calls),
+                    f"{total:.3f}",
+                    f"{slowest:.3f}",
+                    str(size),
+                    str(rows),
+                    f"{size_bytes / 1024:.1f}",
+                ]
+                for model, method, calls, total, slowest, size, rows, size_bytes in self.profiler.call_rows()
+            ],
+        )
+        if path := self.args.profile_output:
+            self.profiler.write_jsonl(path)
+            logger.info(f"Profile written to {path}")
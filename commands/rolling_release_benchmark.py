@@ -0,0 +1,75 @@
+from odev.common import args, progress
+from odev.common.commands import Command
+from odev.common.console import TableHeader
+from odev.common.logging import logging
+
+from odev.plugins.odev_rolling_release.benchmark.harness import Benchmark
+
+
+logger = logging.getLogger(__name__)
+
+
+class RollingReleaseBenchmark(Command):
+
+    _name = "rolling-release-benchmark"
+    _aliases = ["rr-benchmark"]
+
+    size = args.Integer(
+        name="size",
+        aliases=["-n", "--size"],
+        description="Number of synthetic rr tasks served by the fake server.",
+        default=1000,
+    )
+    latency = args.Integer(
+        name="latency",
+        aliases=["-l", "--latency"],
+        description="Latency in milliseconds added by the fake server to every request.",
+        default=50,
+    )
+    repeat = args.Integer(
+        name="repeat",
+        aliases=["-r", "--repeat"],
+        description="Number of runs of every scenario.",
+        default=1,
+    )
+    scenarios = args.String(
+        name="scenarios",
+        aliases=["-sc", "--scenarios"],
+        description="Comma separated scenarios to run: title, title_upgrade, bs4, stats, stats_upgrade.",
+    )
+
+    def _get_titles(self):
+        return [
+            TableHeader("Scenario", style="bold color.purple"),
+            TableHeader("Wall time (s)", align="right"),
+            TableHeader("Round trips", align="right"),
+            TableHeader("Sent (KiB)", align="right"),
+            TableHeader("Received (KiB)", align="right"),
+            TableHeader("Peak memory (MiB)", align="right"),
+        ]
+
+    def run(self):
+        rr_config = self.store.rr_config
+        benchmark = Benchmark(
+            size=self.args.size,
+            latency=self.args.latency / 1000,
+            limit=rr_config.get("odoo_limit"),
+            page_size=rr_config.get("odoo_page_size"),
+            chunk_size=rr_config.get("odoo_chunk_size"),
+        )
+        names = [name.strip() for name in self.args.scenarios.split(",")] if self.args.scenarios else None
+        logger.info(f"Benchmarking rr on {self.args.size} tasks with {self.args.latency}ms of latency")
+        with progress.spinner("Running RR Benchmark..."):
+            results = benchmark.run(names, self.args.repeat)
+        rows = [
+            [
+                result.name,
+                f"{result.wall_time:.3f}",
+                str(result.round_trips),
+                f"{result.bytes_sent / 1024:.1f}",
+                f"{result.bytes_received / 1024:.1f}",
+                f"{result.peak_memory / 1024 / 1024:.2f}",
+            ]
+            for result in results
+        ]
+        self.table(self._get_titles(), rows)
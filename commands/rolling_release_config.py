@@ -1,3 +1,5 @@
+import json
+
 from odev.common import args
 from odev.common.commands import Command
 from odev.common.console import TableHeader
@@ -28,6 +30,28 @@ class RollingReleaseConfig(Command):
         description="Update value and wrapper in the database.",
     )
 
+    action_export = args.String(
+        name="export_file",
+        aliases=["-e", "--export"],
+        description="Export all configurations to a json file.",
+    )
+    action_import = args.String(
+        name="import_file",
+        aliases=["-i", "--import"],
+        description="Import configurations from a json file written by --export, in one transaction.",
+    )
+
+    action_cache_show = args.Flag(
+        name="cache_show",
+        aliases=["-cs", "--cache-show"],
+        description="Show cached responses by model.",
+    )
+    action_cache_purge = args.String(
+        name="cache_purge",
+        aliases=["-cp", "--cache-purge"],
+        description="Purge cached responses of a model, use 'all' to purge everything.",
+    )
+
     def _get_conf_titles(self):
         return [
             TableHeader("Key", style="bold color.purple"),
@@ -35,6 +59,27 @@ class RollingReleaseConfig(Command):
             TableHeader("Wrapper"),
         ]
 
+    def _get_cache_titles(self):
+        return [
+            TableHeader("Model", style="bold color.purple"),
+            TableHeader("Entries"),
+            TableHeader("Size"),
+            TableHeader("Oldest"),
+            TableHeader("Newest"),
+        ]
+
+    def cache_show(self):
+        rows = [
+            [model, str(count), str(size), str(oldest), str(newest)]
+            for model, count, size, oldest, newest in self.store.rr_cache.get_all()
+        ]
+        self.table(self._get_cache_titles(), rows)
+
+    def cache_purge(self, model):
+        model = None if model == "all" else model
+        logger.info(f"Purging cached responses of {model or 'all models'}.")
+        self.store.rr_cache.clean_table(model)
+
     def clean(self):
         confirm: bool = self.console.confirm(
             "Are you sure you want to delete all rr configurations?",
@@ -60,10 +105,29 @@ class RollingReleaseConfig(Command):
             wrapper = self.console.text("Give the new wrapper: ")
             self.store.rr_config.set(key, value, wrapper)
 
+    def export_config(self, path):
+        with open(path, "w") as file:
+            json.dump(self.store.rr_config.export_all(), file, indent=4)
+        logger.info(f"Exported rr configurations to {path}.")
+
+    def import_config(self, path):
+        with open(path) as file:
+            config = json.load(file)
+        self.store.rr_config.import_all(config)
+        logger.info(f"Imported {len(config)} rr configurations from {path}.")
+
     def run(self):
         if self.args.clean:
             self.clean()
+        if import_file := self.args.import_file:
+            self.import_config(import_file)
         if self.args.show:
             self.show_all()
         if update_key := self.args.update_key:
             self.update_key(update_key)
+        if export_file := self.args.export_file:
+            self.export_config(export_file)
+        if self.args.cache_show:
+            self.cache_show()
+        if cache_purge := self.args.cache_purge:
+            self.cache_purge(cache_purge)
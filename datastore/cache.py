@@ -0,0 +1,69 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+from odev.common.postgres import PostgresTable
+
+
+class RRCacheStore(PostgresTable):
+    name = "rr_cache"
+    _columns = {
+        "key": "VARCHAR PRIMARY KEY",
+        "model": "VARCHAR NOT NULL",
+        "value": "TEXT",
+        "date": "TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP",
+    }
+
+    # entries older than this are not served anymore, even as stale ones
+    max_stale: int = 7 * 24 * 3600
+
+    def get(self, key: str) -> Optional[Tuple[List[dict], float]]:
+        result = self.database.query(
+            f"""
+            SELECT value, EXTRACT(EPOCH FROM (LOCALTIMESTAMP - date))
+              FROM {self.name}
+             WHERE key=%s
+             LIMIT 1
+            """,
+            (key,),
+        )
+        if not result:
+            return None
+        value, age = result[0]
+        if float(age) > self.max_stale:
+            return None
+        return json.loads(value), float(age)
+
+    def set(self, key: str, model: str, value: List[Any]) -> None:
+        # entries too old to be served are dropped, nothing else would remove them
+        self.database.query(
+            f"""
+            DELETE FROM {self.name}
+             WHERE date < LOCALTIMESTAMP - make_interval(secs => %s)
+            """,
+            (self.max_stale,),
+        )
+        self.database.query(
+            f"""
+            INSERT INTO {self.name}(key, model, value, date)
+            VALUES (%s, %s, %s, LOCALTIMESTAMP)
+            ON CONFLICT (key) DO UPDATE
+               SET value=EXCLUDED.value, date=EXCLUDED.date
+            """,
+            (key, model, json.dumps(value)),
+        )
+
+    def get_all(self):
+        return self.database.query(
+            f"""
+            SELECT model, COUNT(*), SUM(LENGTH(value)), MIN(date), MAX(date)
+              FROM {self.name}
+             GROUP BY model
+             ORDER BY model
+            """
+        )
+
+    def clean_table(self, model: Optional[str] = None):
+        if model:
+            self.database.query(f"DELETE FROM {self.name} WHERE model=%s", (model,))
+        else:
+            self.database.query(f"DELETE FROM {self.name}")
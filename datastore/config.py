@@ -1,12 +1,38 @@
+import ast
+import json
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from odev.common.logging import logging
 from odev.common.postgres import PostgresTable
 
 
+logger = logging.getLogger(__name__)
+
+
+def _to_bool(value: str) -> bool:
+    # bool("False") is True, the text is read instead
+    text = value.strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"{value!r} is not a boolean")
+
+
 class RRConfigStore(PostgresTable):
     name = "rr_config"
     _columns = {
         "key": "VARCHAR PRIMARY KEY",
         "value": "VARCHAR",
         "wrapper": "VARCHAR",
+        "typed_value": "JSONB",
         "date": "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
     }
 
@@ -16,92 +42,187 @@ class RRConfigStore(PostgresTable):
         "odoo_url_upg": {"default": "upgrade.odoo.com"},
         "odoo_database_name_upg": {"default": "odoo_upgrade"},
         "odoo_limit": {"wrapper": "int", "default": "700"},
+        "odoo_page_size": {"wrapper": "int", "default": "1000"},
+        "odoo_chunk_size": {"wrapper": "int", "default": "200"},
+        "odoo_session_ttl": {"wrapper": "int", "default": "86400"},
         "odoo_task_domain": {
             "default": '["&", "&", "&", ["name", "ilike", "[rr]%"], ["user_ids", "=", False], ["stage_id", "in", [25525]], ["tag_ids", "in", [25106]]]',  # noqa: B950 [line too long]
             "wrapper": "eval",
         },
+        "odoo_cache_ttl": {
+            "default": '{"project.task": 60, "openerp.enterprise.database": 300, "sale.order": 3600, "upgrade.request": 300}',  # noqa: B950 [line too long]
+            "wrapper": "eval",
+        },
     }
 
+    # how the text typed by the user is turned into the value stored in typed_value
+    _converters: Dict[str, Callable[[str], Any]] = {
+        "int": int,
+        "float": float,
+        "str": str,
+        "bool": _to_bool,
+        "eval": ast.literal_eval,
+    }
+
+    # key: (date, typed value), loaded at once by _load_snapshot, then by refresh for the rows whose date changed
+    _snapshot: Optional[Dict[str, Tuple[Any, Any]]] = None
+
     def clean_table(self):
         self.database.query(
             f"""
                 DELETE FROM {self.name}
             """
         )
+        self._snapshot = None
 
-    def _create_default(self, key):
-        key_data = self._default_keys.get(key, None)
-        if key_data is None:
-            raise Exception("No key in _default_keys")
-        value = key_data.get("default", None)
-        wrapper = key_data.get("wrapper", None)
-        value_str = f"{value!r}" if value is not None else "NULL"
-        wrapper_str = f"{wrapper!r}" if wrapper else "NULL"
-        values = f"{key!r},{value_str},{wrapper_str}"
+    def _convert(self, value: Optional[str], wrapper: Optional[str]) -> Any:
+        if not wrapper or value is None:
+            return value
+        if wrapper not in self._converters:
+            raise ValueError(f"Unknown wrapper {wrapper}, use one of {', '.join(self._converters)}")
+        return self._converters[wrapper](value)
 
-        self.database.query(
+    def _to_text(self, value: Any, wrapper: Optional[str]) -> Optional[str]:
+        # readable version kept in the value column for rr-config --show
+        if value is None:
+            return None
+        return repr(value) if wrapper == "eval" else str(value)
+
+    def _migrate_typed_values(self) -> None:
+        # rows written before typed_value existed only have the text value and its wrapper
+        self.database.query(f"ALTER TABLE {self.name} ADD COLUMN IF NOT EXISTS typed_value JSONB")
+        result = self.database.query(
             f"""
-                INSERT INTO {self.name}(key, value, wrapper)
-                VALUES ({values}) ON CONFLICT DO NOTHING
+            SELECT key, value, wrapper
+              FROM {self.name}
+             WHERE typed_value IS NULL
+               AND value IS NOT NULL
             """
         )
-        return eval(wrapper)(value) if wrapper is not None else value
-
-    def _force_load_keys(self):
-        for key in self._default_keys.keys():
-            self.get(key)
-
-    def prepare_database_table(self):
-        super().prepare_database_table()
-        self._force_load_keys()
-
-    def set(self, key, value, wrapper=None):
-        wrapper_query = None
-        if not value:
-            value = "NULL"
-        elif not isinstance(value, str):
-            value = f"{str(value)!r}"
-        if wrapper:
+        rows = []
+        for key, value, wrapper in result or []:
             try:
-                eval(wrapper)(value)
-                wrapper_query = f"{str(wrapper)!r}"
-            except Exception:
-                raise Exception(f"Error in value {value}, the wrapper: {wrapper} looks not valid")
-        else:
-            wrapper_query = "NULL"
+                typed_value = self._convert(value, wrapper)
+            except (ValueError, SyntaxError, TypeError) as error:
+                # e.g. an eval wrapper on an expression, the text is kept until it is set again with rr-config
+                logger.warning(f"Could not convert rr_config key {key} ({wrapper}: {value!r}), kept as text: {error}")
+                typed_value = value
+            rows.append((key, value, wrapper, typed_value))
+        self._upsert(rows, update_date=False)
 
+    def _upsert(self, rows: List[Tuple[str, Optional[str], Optional[str], Any]], update_date: bool = True) -> None:
+        # (key, value, wrapper, typed value), all written by a single statement
+        if not rows:
+            return
+        values = ", ".join(["(%s, %s, %s, %s::jsonb)"] * len(rows))
+        params: List[Any] = []
+        for key, value, wrapper, typed_value in rows:
+            params.extend([key, value, wrapper, json.dumps(typed_value)])
+        date = ", date=CURRENT_TIMESTAMP" if update_date else ""
         self.database.query(
             f"""
-            UPDATE {self.name}
-               SET value={value}, wrapper={wrapper_query}
-            WHERE key={key!r}
-            """
+            INSERT INTO {self.name}(key, value, wrapper, typed_value)
+            VALUES {values}
+            ON CONFLICT (key) DO UPDATE
+               SET value=EXCLUDED.value, wrapper=EXCLUDED.wrapper, typed_value=EXCLUDED.typed_value{date}
+            """,
+            tuple(params),
         )
+        self._snapshot = None
 
-    def get(self, key):
+    def _load_snapshot(self) -> Dict[str, Tuple[Any, Any]]:
         result = self.database.query(
             f"""
-            SELECT value, wrapper
+            SELECT key, date, typed_value
               FROM {self.name}
-             WHERE key={key!r}
-             LIMIT 1
             """
         )
-        if not len(result):
-            return self._create_default(key)
-        value, wrapper = result[0]
-        if wrapper and value is not None:
-            value = eval(wrapper)(value)
-        return value
+        self._snapshot = {key: (date, typed_value) for key, date, typed_value in result or []}
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        # only the values whose date changed are read again, tells if any did
+        if self._snapshot is None:
+            self._load_snapshot()
+            return True
+        dates = dict(
+            self.database.query(
+                f"""
+                SELECT key, date
+                  FROM {self.name}
+                """
+            )
+            or []
+        )
+        removed = [key for key in self._snapshot if key not in dates]
+        for key in removed:
+            del self._snapshot[key]
+        changed = [key for key, date in dates.items() if key not in self._snapshot or self._snapshot[key][0] != date]
+        if changed:
+            result = self.database.query(
+                f"""
+                SELECT key, date, typed_value
+                  FROM {self.name}
+                 WHERE key = ANY(%s)
+                """,
+                (changed,),
+            )
+            self._snapshot.update((key, (date, typed_value)) for key, date, typed_value in result or [])
+        return bool(removed or changed)
+
+    def _seed_defaults(self, keys: Optional[List[str]] = None) -> None:
+        keys = list(self._default_keys) if keys is None else keys
+        if unknown := [key for key in keys if key not in self._default_keys]:
+            raise Exception(f"No key in _default_keys: {', '.join(unknown)}")
+        if not keys:
+            return
+        values = ", ".join(["(%s, %s, %s, %s::jsonb)"] * len(keys))
+        params: List[Any] = []
+        for key in keys:
+            value, wrapper = self._default_keys[key].get("default"), self._default_keys[key].get("wrapper")
+            params.extend([key, value, wrapper, json.dumps(self._convert(value, wrapper))])
+        self.database.query(
+            f"""
+                INSERT INTO {self.name}(key, value, wrapper, typed_value)
+                VALUES {values} ON CONFLICT DO NOTHING
+            """,
+            tuple(params),
+        )
+
+    def _force_load_keys(self):
+        self._seed_defaults()
+        self._load_snapshot()
+
+    def prepare_database_table(self):
+        super().prepare_database_table()
+        self._migrate_typed_values()
+        self._force_load_keys()
+
+    def set(self, key, value, wrapper=None):
+        value = value or None
+        wrapper = wrapper or None
+        try:
+            typed_value = self._convert(value, wrapper)
+        except Exception:
+            raise Exception(f"Error in value {value}, the wrapper: {wrapper} looks not valid")
+        self._upsert([(key, value, wrapper, typed_value)])
+
+    def get(self, key):
+        snapshot = self._snapshot if self._snapshot is not None else self._load_snapshot()
+        if key not in snapshot:
+            self._seed_defaults([key])
+            snapshot = self._load_snapshot()
+        return snapshot[key][1]
 
     def get_row(self, key):
         return self.database.query(
             f"""
             SELECT key, value, wrapper
               FROM {self.name}
-             WHERE key={key!r}
+             WHERE key=%s
              LIMIT 1
-            """
+            """,
+            (key,),
         )
 
     def get_all(self):
@@ -111,3 +232,28 @@ class RRConfigStore(PostgresTable):
               FROM {self.name}
             """
         )
+
+    def export_all(self) -> Dict[str, Dict[str, Any]]:
+        result = self.database.query(
+            f"""
+            SELECT key, wrapper, typed_value
+              FROM {self.name}
+             ORDER BY key
+            """
+        )
+        return {key: {"value": typed_value, "wrapper": wrapper} for key, wrapper, typed_value in result or []}
+
+    def import_all(self, config: Dict[str, Dict[str, Any]]) -> None:
+        # every key is written by the same statement: all of them or none
+        rows = []
+        for key, data in config.items():
+            wrapper = data.get("wrapper") or None
+            if wrapper and wrapper not in self._converters:
+                raise Exception(f"Error in key {key}, the wrapper: {wrapper} looks not valid")
+            value = self._to_text(data.get("value"), wrapper)
+            try:
+                typed_value = self._convert(value, wrapper)
+            except (ValueError, SyntaxError, TypeError):
+                raise Exception(f"Error in key {key}, the value: {value} does not match the wrapper: {wrapper}")
+            rows.append((key, value, wrapper, typed_value))
+        self._upsert(rows)
@@ -0,0 +1,170 @@
+import json
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from odev.common.postgres import PostgresTable
+
+from odev.plugins.odev_rolling_release.utils.utils import TripleFlag
+
+
+TASK_MODEL = "project.task"
+DATABASE_MODEL = "openerp.enterprise.database"
+SALE_ORDER_MODEL = "sale.order"
+
+
+class RRMirrorStore(PostgresTable):
+    name = "rr_mirror"
+    _columns = {
+        "key": "VARCHAR PRIMARY KEY",
+        "model": "VARCHAR NOT NULL",
+        "res_id": "INTEGER NOT NULL",
+        "data": "JSONB NOT NULL",
+        "write_date": "TIMESTAMP",
+        "sync_date": "TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP",
+    }
+
+    _stats_fields = {"version", "parent_id", "subscription_id"}
+
+    def clean_table(self):
+        self.database.query(
+            f"""
+                DELETE FROM {self.name}
+            """
+        )
+
+    def get_cursor(self, model: str) -> Optional[str]:
+        result = self.database.query(
+            f"""
+            SELECT MAX(write_date)
+              FROM {self.name}
+             WHERE model=%s
+            """,
+            (model,),
+        )
+        if not result or not result[0][0]:
+            return None
+        return result[0][0].strftime("%Y-%m-%d %H:%M:%S")
+
+    def get_ids(self, model: str) -> Set[int]:
+        result = self.database.query(f"SELECT res_id FROM {self.name} WHERE model=%s", (model,))
+        return {res_id for res_id, in result or []}
+
+    def get_records(self, model: str) -> List[dict]:
+        result = self.database.query(f"SELECT data FROM {self.name} WHERE model=%s", (model,))
+        return [data for data, in result or []]
+
+    def upsert(self, model: str, records: List[dict]) -> None:
+        if not records:
+            return
+        values = ", ".join(["(%s, %s, %s, %s::jsonb, %s::timestamp, LOCALTIMESTAMP)"] * len(records))
+        params: List[Any] = []
+        for record in records:
+            params.extend(
+                [f"{model},{record['id']}", model, record["id"], json.dumps(record), record.get("write_date") or None]
+            )
+        self.database.query(
+            f"""
+            INSERT INTO {self.name}(key, model, res_id, data, write_date, sync_date)
+            VALUES {values}
+            ON CONFLICT (key) DO UPDATE
+               SET data=EXCLUDED.data, write_date=EXCLUDED.write_date, sync_date=EXCLUDED.sync_date
+            """,
+            tuple(params),
+        )
+
+    def delete(self, model: str, ids: Set[int]) -> None:
+        if not ids:
+            return
+        self.database.query(
+            f"DELETE FROM {self.name} WHERE model=%s AND res_id = ANY(%s)",
+            (model, list(ids)),
+        )
+
+    def _many2one_id(self, alias: str, field: str) -> str:
+        # many2one values are stored as read: [id, name], id or false
+        return f"""(CASE jsonb_typeof({alias}.data->'{field}')
+                    WHEN 'array' THEN ({alias}.data->'{field}'->>0)::int
+                    WHEN 'number' THEN ({alias}.data->>'{field}')::int
+                END)"""
+
+    def _database_filters(self, parent: TripleFlag, contract: TripleFlag) -> str:
+        filters = ""
+        for field, value in (("parent_id", parent), ("subscription_id", contract)):
+            if value != TripleFlag.BOTH:
+                operator = "IS NOT NULL" if value == TripleFlag.YES else "IS NULL"
+                filters += f" AND {self._many2one_id('d', field)} {operator}"
+        return filters
+
+    def _task_filters(self, task_names: Optional[List[str]]) -> Tuple[str, Tuple[Any, ...]]:
+        if not task_names:
+            return "", ()
+        return " AND t.data->>'name' ILIKE ANY(%s)", ([f"%{task_name}%" for task_name in task_names],)
+
+    def search(
+        self,
+        last_ping: str,
+        task_names: Optional[List[str]] = None,
+        parent: TripleFlag = TripleFlag.BOTH,
+        contract: TripleFlag = TripleFlag.BOTH,
+        hide_not_found: bool = True,
+        limit: Optional[int] = None,
+        order_by_validity: bool = False,
+    ) -> List[Tuple[int, str, Optional[dict], Optional[dict]]]:
+        task_filters, task_params = self._task_filters(task_names)
+        found_filter = " AND d.key IS NOT NULL" if hide_not_found else ""
+        # date_valid is stored as read, "%Y-%m-%d %H:%M:%S" sorts like the dates
+        order = "d.data->>'date_valid' NULLS LAST, t.res_id" if order_by_validity else "t.res_id"
+        return self.database.query(
+            f"""
+            SELECT t.res_id, t.data->>'name', d.data, s.data
+              FROM {self.name} t
+              LEFT JOIN {self.name} d
+                ON d.model=%s
+               AND d.data->>'db_name' = replace(t.data->>'name', '[rr] ', '')
+               AND d.data->>'last_ping' > %s{self._database_filters(parent, contract)}
+              LEFT JOIN {self.name} s
+                ON s.model=%s
+               AND s.res_id = {self._many2one_id('d', 'subscription_id')}
+             WHERE t.model=%s{task_filters}{found_filter}
+             ORDER BY {order}
+             LIMIT %s
+            """,
+            (DATABASE_MODEL, last_ping, SALE_ORDER_MODEL, TASK_MODEL, *task_params, limit),
+        )
+
+    def stats(
+        self,
+        dimensions: List[str],
+        last_ping: str,
+        task_names: Optional[List[str]] = None,
+        parent: TripleFlag = TripleFlag.BOTH,
+        contract: TripleFlag = TripleFlag.BOTH,
+    ) -> List[Dict[str, Any]]:
+        # same shape as a read_group with lazy=False on the dimensions
+        if unknown := set(dimensions) - self._stats_fields:
+            raise ValueError(f"Can not group mirrored databases by {', '.join(unknown)}")
+        task_filters, task_params = self._task_filters(task_names)
+        columns = ", ".join(f"d.data->'{dimension}'" for dimension in dimensions)
+        group_by = ", ".join(str(index) for index in range(1, len(dimensions) + 1))
+        result = self.database.query(
+            f"""
+            SELECT {columns}, COUNT(*)
+              FROM {self.name} d
+             WHERE d.model=%s
+               AND d.data->>'last_ping' > %s{self._database_filters(parent, contract)}
+               AND d.data->>'db_name' IN (
+                   SELECT replace(t.data->>'name', '[rr] ', '')
+                     FROM {self.name} t
+                    WHERE t.model=%s{task_filters}
+               )
+             GROUP BY {group_by}
+            """,
+            (DATABASE_MODEL, last_ping, TASK_MODEL, *task_params),
+        )
+        return [{**dict(zip(dimensions, row[:-1])), "__count": row[-1]} for row in result or []]
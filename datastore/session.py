@@ -0,0 +1,51 @@
+from typing import Optional
+
+from odev.common.postgres import PostgresTable
+
+
+class RRSessionStore(PostgresTable):
+    name = "rr_session"
+    _columns = {
+        "endpoint": "VARCHAR PRIMARY KEY",
+        "user_id": "INTEGER NOT NULL",
+        "expire_date": "TIMESTAMP NOT NULL",
+    }
+
+    def get(self, endpoint: str) -> Optional[int]:
+        result = self.database.query(
+            f"""
+            SELECT user_id
+              FROM {self.name}
+             WHERE endpoint=%s
+               AND expire_date > LOCALTIMESTAMP
+            """,
+            (endpoint,),
+        )
+        return result[0][0] if result else None
+
+    def set(self, endpoint: str, user_id: int, ttl: int) -> None:
+        self.database.query(
+            f"""
+            INSERT INTO {self.name}(endpoint, user_id, expire_date)
+            VALUES (%s, %s, LOCALTIMESTAMP + make_interval(secs => %s))
+            ON CONFLICT (endpoint) DO UPDATE
+               SET user_id=EXCLUDED.user_id, expire_date=EXCLUDED.expire_date
+            """,
+            (endpoint, user_id, ttl),
+        )
+
+    def delete(self, endpoint: str) -> None:
+        self.database.query(
+            f"""
+            DELETE FROM {self.name}
+             WHERE endpoint=%s
+            """,
+            (endpoint,),
+        )
+
+    def clean_table(self):
+        self.database.query(
+            f"""
+                DELETE FROM {self.name}
+            """
+        )
@@ -0,0 +1,50 @@
+from typing import Dict, List, Tuple
+
+from odev.common.postgres import PostgresTable
+
+
+class RRTaskUrlStore(PostgresTable):
+    name = "rr_task_url"
+    _columns = {
+        "task_id": "INTEGER PRIMARY KEY",
+        "write_date": "VARCHAR NOT NULL",
+        "url": "VARCHAR",
+        "date": "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+    }
+
+    def get_many(self, write_dates: Dict[int, str]) -> Dict[int, str]:
+        # only urls extracted from the same version of the description are returned
+        if not write_dates:
+            return {}
+        result = self.database.query(
+            f"""
+            SELECT task_id, write_date, url
+              FROM {self.name}
+             WHERE task_id = ANY(%s)
+            """,
+            (list(write_dates),),
+        )
+        return {
+            task_id: url or "" for task_id, write_date, url in result or [] if write_dates.get(task_id) == write_date
+        }
+
+    def set_many(self, urls: List[Tuple[int, str, str]]) -> None:
+        if not urls:
+            return
+        values = ", ".join(["(%s, %s, %s, CURRENT_TIMESTAMP)"] * len(urls))
+        self.database.query(
+            f"""
+            INSERT INTO {self.name}(task_id, write_date, url, date)
+            VALUES {values}
+            ON CONFLICT (task_id) DO UPDATE
+               SET write_date=EXCLUDED.write_date, url=EXCLUDED.url, date=EXCLUDED.date
+            """,
+            tuple(value for url in urls for value in url),
+        )
+
+    def clean_table(self):
+        self.database.query(
+            f"""
+                DELETE FROM {self.name}
+            """
+        )
@@ -0,0 +1,79 @@
+from odev.plugins.odev_rolling_release.utils.osv import (
+    AND,
+    LOCAL_OPERATORS,
+    TRUE_DOMAIN,
+    canonical_domain,
+    evaluate_domain,
+    filter_records,
+    partition_domain,
+)
+
+
+RECORDS = [
+    {"id": 1, "name": "[rr] acme_prod", "parent_id": [7, "acme"], "subscription_id": False},
+    {"id": 2, "name": "[rr] acme-prod", "parent_id": False, "subscription_id": [3, "SO003"]},
+    {"id": 3, "name": "[RR] Other", "parent_id": False, "subscription_id": False},
+]
+
+
+def _ids(domain):
+    return [record["id"] for record in filter_records(domain, RECORDS)]
+
+
+def test_canonical_domain_ignores_order_and_duplicates():
+    first = [["name", "ilike", "rr"], ["id", ">", 1]]
+    second = ["&", ["id", ">", 1], "&", ["name", "ilike", "rr"], ["id", ">", 1]]
+    assert canonical_domain(first) == canonical_domain(second)
+    assert canonical_domain(AND([first, TRUE_DOMAIN])) == canonical_domain(first)
+
+
+def test_canonical_domain_keeps_or_expressions():
+    domain = ["|", ["id", "=", 1], ["id", "=", 2], ["name", "ilike", "rr"]]
+    canonical = canonical_domain(domain)
+    assert _ids(canonical) == _ids(domain) == [1, 2]
+    assert canonical_domain(TRUE_DOMAIN) == []
+
+
+def test_partition_domain_keeps_the_same_records():
+    domain = [["name", "ilike", "rr"], ["parent_id", "=", False], "|", ["id", "=", 1], ["parent_id", "!=", False]]
+    remote, local = partition_domain(domain, {"parent_id"})
+    assert remote == AND([[["name", "ilike", "rr"]], ["|", ["id", "=", 1], ["parent_id", "!=", False]]])
+    assert local == [("parent_id", "=", False)]
+    assert _ids(AND([remote, local])) == _ids(domain)
+
+
+def test_partition_domain_keeps_unknown_operators_remote():
+    remote, local = partition_domain([["parent_id", "child_of", 7]], {"parent_id"})
+    assert remote == [("parent_id", "child_of", 7)]
+    assert local == TRUE_DOMAIN
+
+
+def test_ilike_wildcards():
+    assert _ids([["name", "ilike", "acme_prod"]]) == [1, 2]
+    assert _ids([["name", "ilike", "rr%other"]]) == [3]
+    assert _ids([["name", "not ilike", "acme"]]) == [3]
+    assert not evaluate_domain([["subscription_id", "ilike", "SO"]], RECORDS[0])
+
+
+def test_like_is_case_sensitive():
+    assert _ids([["name", "like", "[rr]"]]) == [1, 2]
+    assert _ids([["name", "not like", "[rr]"]]) == [3]
+
+
+def test_equal_like_matches_the_whole_value():
+    assert _ids([["name", "=like", "acme%"]]) == []
+    assert _ids([["name", "=like", "[rr] acme_prod"]]) == [1, 2]
+    assert _ids([["name", "=ilike", "[rr] other"]]) == [3]
+    assert _ids([["name", "=like", "[rr] other"]]) == []
+
+
+def test_many2one_compared_on_their_id():
+    assert _ids([["parent_id", "in", [7]]]) == [1]
+    assert _ids([["subscription_id", "=", 3]]) == [2]
+    assert _ids(["!", ["subscription_id", "=", False]]) == [2]
+
+
+def test_every_local_operator_accepts_false():
+    for operator, evaluate in LOCAL_OPERATORS.items():
+        arg = [] if operator.endswith("in") else "x"
+        assert isinstance(evaluate(False, arg), bool), operator
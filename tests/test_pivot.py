@@ -0,0 +1,33 @@
+import pytest
+
+from odev.plugins.odev_rolling_release.utils.pivot import Pivot
+
+
+GROUPS = [
+    {"version": "17.0", "parent_id": [1, "acme"], "__count": 3},
+    {"version": "17.0", "parent_id": False, "__count": 2},
+    {"version": "18.0", "parent_id": [1, "acme"], "__count": 4},
+    {"version": "saas~17.2", "parent_id": False, "__count": 1},
+]
+
+
+def test_marginal_totals():
+    pivot = Pivot(GROUPS, ["version", "parent_id"])
+    assert pivot.marginal("version") == [
+        {"version": "17.0", "__count": 5},
+        {"version": "18.0", "__count": 4},
+        {"version": "saas~17.2", "__count": 1},
+    ]
+    assert pivot.marginal("parent_id") == [{"parent_id": [1, "acme"], "__count": 7}, {"parent_id": False, "__count": 3}]
+    assert sum(row["__count"] for row in pivot.marginal("version")) == 10
+
+
+def test_crosstab_row_totals():
+    columns, rows = Pivot(GROUPS, ["version", "parent_id"]).crosstab("version", "parent_id", bool)
+    assert columns == [True, False]
+    assert rows == [["17.0", 3, 2, 5], ["18.0", 4, 0, 4], ["saas~17.2", 0, 1, 1]]
+
+
+def test_unknown_dimension():
+    with pytest.raises(ValueError):
+        Pivot(GROUPS, ["version"]).marginal("parent_id")
@@ -0,0 +1,59 @@
+import pytest
+
+from odev.plugins.odev_rolling_release.api.services.query import Query
+
+
+def test_key_does_not_depend_on_the_build_order():
+    first = (
+        Query("project.task").with_domain([["name", "ilike", "rr"]]).with_fields(["name"]).with_domain([["id", ">", 1]])
+    )
+    second = Query("project.task", fields=["name", "id"]).with_domain([["id", ">", 1], ["name", "ilike", "rr"]])
+    assert first.key() == second.key()
+    assert first == second
+
+
+def test_key_changes_with_the_request():
+    query = Query("project.task", [["id", ">", 1]])
+    assert query.key() != query.with_limit(10).key()
+    assert query.key() != query.with_fields(["name"]).key()
+    assert query.key() != query.key(order="id desc")
+    assert query.key() != Query("sale.order", [["id", ">", 1]]).key()
+
+
+def test_key_is_stable():
+    # cache entries are stored by key, it must be the same from a run to the next
+    query = Query("project.task", [["id", "in", [1, 2]]], ["name"], 5)
+    assert query.key() == "077bf9a99065910fb7523f4321425fcdd5fc90c8"
+
+
+def test_with_gives_a_new_query():
+    query = Query("project.task")
+    limited = query.with_limit(10)
+    assert query.limit is None
+    assert limited.limit == 10
+    with pytest.raises(AttributeError):
+        query.limit = 5
+
+
+def test_partition_drops_the_limit_for_local_conditions():
+    query = Query("db", [["name", "ilike", "rr"], ["parent_id", "=", False]], ["name"], 10, ["parent_id"])
+    remote, local = query.partition()
+    assert local == [("parent_id", "=", False)]
+    assert remote.domain == (("name", "ilike", "rr"),)
+    assert remote.limit is None
+    assert "parent_id" in remote.fields
+
+
+def test_local_conditions_send_the_same_query():
+    # --parent and --contract only change the local domain, they share the cache entry of the default run
+    query = Query("openerp.enterprise.database", [["db_name", "in", ["a", "b"]]], ["db_name"], 700)
+    query = query.with_local_fields(["parent_id", "subscription_id"])
+    flags = [
+        [],
+        [["parent_id", "=", False]],
+        [["subscription_id", "!=", False]],
+        [["parent_id", "!=", False], ["subscription_id", "=", False]],
+    ]
+    remotes = [query.with_domain(domain).partition()[0] for domain in flags]
+    assert len({remote.key() for remote in remotes}) == 1
+    assert remotes[0].limit is None
@@ -0,0 +1,59 @@
+from math import isnan
+
+from odev.plugins.odev_rolling_release.utils.record_batch import MISSING, RecordBatch
+
+
+def _batch():
+    records = [
+        {"id": 3, "name": "c", "date": 20.0},
+        {"id": 1, "name": "a", "date": float("nan")},
+        {"id": 2, "name": "b", "date": 10.0},
+        {"id": 4, "name": "d", "date": 10.0},
+    ]
+    return RecordBatch.from_records(
+        records,
+        {
+            "id": ("q", lambda record: record["id"]),
+            "name": (None, lambda record: record["name"]),
+            "date": ("d", lambda record: record["date"]),
+        },
+    )
+
+
+def test_argsort_puts_nan_first_and_is_stable():
+    batch = _batch()
+    assert list(batch.sort("date")["id"]) == [1, 2, 4, 3]
+    assert list(batch.sort("id").sort("date", reverse=True)["id"]) == [3, 2, 4, 1]
+
+
+def test_lookup_and_gather():
+    batch = _batch()
+    other = RecordBatch.from_records(
+        [{"key": "b", "version": "17.0", "count": 5}, {"key": "c", "version": "18.0", "count": 7}],
+        {
+            "key": (None, lambda record: record["key"]),
+            "version": (None, lambda record: record["version"]),
+            "count": ("q", lambda record: record["count"]),
+        },
+    )
+    positions = batch.lookup("name", other, "key")
+    assert list(positions) == [1, MISSING, 0, MISSING]
+    merged = batch.gather(other, positions, {"version": "version", "count": "count"}, {"version": "NO VERSION"})
+    assert merged["version"] == ["18.0", "NO VERSION", "17.0", "NO VERSION"]
+    assert list(merged["count"]) == [7, 0, 5, 0]
+    assert list(merged.rows(["name", "version"]))[0] == ("c", "18.0")
+
+
+def test_gather_missing_float_is_nan():
+    batch = _batch()
+    other = RecordBatch.from_records([], {"key": (None, lambda record: record), "date": ("d", lambda record: record)})
+    merged = batch.gather(other, batch.lookup("name", other, "key"), {"date": "other_date"})
+    assert all(isnan(value) for value in merged["other_date"])
+
+
+def test_filter_and_take_keep_the_column_types():
+    batch = _batch().filter([True, False, True, False])
+    assert len(batch) == 2
+    assert list(batch["id"]) == [3, 2]
+    assert batch["id"].typecode == "q"
+    assert batch.take([1])["name"] == ["b"]
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from odev.common.connectors.rpc import RpcConnector
+from odev.common.databases.remote import RemoteDatabase
+
+from odev.plugins.odev_rolling_release.api.services.database_service import DatabaseService
+from odev.plugins.odev_rolling_release.utils.utils import DaysAgo
+
+
+def _service(url="https://www.odoo.com", database="openerp"):
+    return DatabaseService(RpcConnector(RemoteDatabase(url, database)))
+
+
+def _key(service, domain):
+    return service._cache_key(service.with_domain(domain).with_fields(["db_name"]).query, order="id")
+
+
+def test_cache_key_is_stable_from_a_day_to_the_next():
+    service = _service()
+    today = _key(service, [["last_ping", ">", DaysAgo(30)]])
+    with mock.patch("odev.plugins.odev_rolling_release.utils.utils.datetime") as tomorrow:
+        tomorrow.now.return_value = datetime.now() + timedelta(days=1)
+        assert _key(service, [["last_ping", ">", DaysAgo(30)]]) == today
+    assert _key(service, [["last_ping", ">", DaysAgo(31)]]) != today
+
+
+def test_cache_key_depends_on_the_endpoint():
+    domain = [["db_name", "in", ["a", "b"]]]
+    key = _key(_service(), domain)
+    assert _key(_service(), domain) == key
+    assert _key(_service(database="other"), domain) != key
+    assert _key(_service(url="https://staging.odoo.com"), domain) != key
+
+
+def test_split_domain_chunks_the_biggest_in_leaf():
+    service = _service().set_chunk_size(2)
+    domain = [["active", "=", True], ["db_name", "in", ["a"]], ["id", "in", [1, 2, 3, 4, 5]]]
+    assert service._split_domain(domain) == [
+        ["&", "&", ("active", "=", True), ("db_name", "in", ["a"]), ("id", "in", chunk)] for chunk in ([1, 2], [3, 4], [5])
+    ]
+    assert service._split_domain([["id", "in", [1, 2]]]) == [[["id", "in", [1, 2]]]]
+    assert service._split_domain(["!", ["id", "in", [1, 2, 3]]]) == [["!", ["id", "in", [1, 2, 3]]]]
+
+
+def test_fetch_group_adds_up_the_chunks():
+    versions = {1: "17.0", 2: "17.0", 3: "18.0", 4: "17.0", 5: False}
+
+    def read_group(method, domain, groupby, **kwargs):
+        counts = {}
+        for record_id in domain[-1][2]:
+            counts[versions[record_id]] = counts.get(versions[record_id], 0) + 1
+        return [{"version": version, "__count": count} for version, count in counts.items()]
+
+    service = _service().set_chunk_size(2).with_domain([["id", "in", list(versions)]]).with_limit(None)
+    with mock.patch.object(DatabaseService, "_call", side_effect=read_group) as call:
+        groups = service.fetch_group(["version"], lazy=False)
+    assert call.call_count == 3
+    assert sorted(groups, key=str) == sorted(
+        [{"version": "17.0", "__count": 3}, {"version": "18.0", "__count": 1}, {"version": False, "__count": 1}],
+        key=str,
+    )
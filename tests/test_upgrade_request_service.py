@@ -0,0 +1,65 @@
+from unittest import mock
+
+from odev.common.connectors.rpc import RpcConnector
+from odev.common.databases.remote import RemoteDatabase
+
+from odev.plugins.odev_rolling_release.api.services.upgrade_request_service import UpgradeRequestService
+
+
+REQUESTS = [
+    {"id": 1, "db_uuid": "a", "last_traceback": "Traceback: first error"},
+    {"id": 4, "db_uuid": "a", "last_traceback": False},
+    {"id": 2, "db_uuid": "b", "last_traceback": "Traceback: KeyError"},
+    {"id": 3, "db_uuid": "c", "last_traceback": False},
+    {"id": 5, "db_uuid": "c", "last_traceback": "Traceback: ValueError"},
+]
+
+
+def _call(method, domain, **kwargs):
+    leaves = [leaf for leaf in domain if isinstance(leaf, (list, tuple))]
+    records = [
+        request
+        for request in REQUESTS
+        if all(
+            request[field] in values if operator == "in" else request[field] != values
+            for field, operator, values in leaves
+        )
+    ]
+    if method == "read_group":
+        latest = {}
+        for request in records:
+            latest[request["db_uuid"]] = max(latest.get(request["db_uuid"], 0), request["id"])
+        return [{"db_uuid": db_uuid, "id": request_id, "__count": 1} for db_uuid, request_id in latest.items()]
+    return [{field: request[field] for field in kwargs["fields"]} for request in records]
+
+
+def _service():
+    return UpgradeRequestService(RpcConnector(RemoteDatabase("https://upgrade.odoo.com", "upgrade")))
+
+
+def _search_read(service, limit=None, fields=("id", "db_uuid", "last_traceback")):
+    with mock.patch.object(UpgradeRequestService, "_call", side_effect=_call):
+        rows = service._search_read([["db_uuid", "in", ["a", "b", "c"]]], list(fields), limit)
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def test_only_the_latest_request_of_each_database():
+    assert _search_read(_service()) == [
+        {"id": 2, "db_uuid": "b", "last_traceback": True},
+        {"id": 4, "db_uuid": "a", "last_traceback": False},
+        {"id": 5, "db_uuid": "c", "last_traceback": True},
+    ]
+
+
+def test_latest_requests_across_chunks():
+    rows = _search_read(_service().set_chunk_size(1), fields=["id", "db_uuid"])
+    assert rows == [{"id": 2, "db_uuid": "b"}, {"id": 4, "db_uuid": "a"}, {"id": 5, "db_uuid": "c"}]
+
+
+def test_limit_keeps_the_newest_requests():
+    assert [row["id"] for row in _search_read(_service(), limit=2, fields=["id", "db_uuid"])] == [4, 5]
+
+
+def test_tracebacks_are_truncated_to_their_end():
+    rows = _search_read(_service().with_traceback(10))
+    assert [row["last_traceback"] for row in rows] == [": KeyError", False, "ValueError"]
@@ -0,0 +1,15 @@
+from odev.plugins.odev_rolling_release.api.strategy.watch import ADDED, CHANGED, REMOVED, WatchState
+
+
+def test_update_rows_reports_every_change_once():
+    state = WatchState()
+    assert state.update_rows({1: ["a", "17.0"], 2: ["b", "18.0"]}) == [(ADDED, ["a", "17.0"]), (ADDED, ["b", "18.0"])]
+    changes = state.update_rows({2: ["b", "saas~18.1"], 3: ["c", "17.0"]})
+    assert changes == [(CHANGED, ["b", "saas~18.1"]), (ADDED, ["c", "17.0"]), (REMOVED, ["a", "17.0"])]
+    assert state.update_rows({2: ["b", "saas~18.1"], 3: ["c", "17.0"]}) == []
+
+
+def test_update_rows_follows_the_order_of_the_new_rows():
+    state = WatchState()
+    state.update_rows({1: ["a"], 2: ["b"]})
+    assert [row for _, row in state.update_rows({3: ["c"], 2: ["b2"], 1: ["a2"]})] == [["c"], ["b2"], ["a2"]]
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import sys
+from typing import (
+    IO,
+    Any,
+    Iterable,
+    List,
+    Optional,
+)
+
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+
+def _import_pyarrow() -> Any:
+    # optional dependency, only needed by the parquet output
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError("The parquet output needs pyarrow, install it with `pip install pyarrow`")
+    return pyarrow
+
+
+class RowWriter:
+    # Writes the rows of a table as they come, nothing is kept once written.
+
+    columns: List[str]
+
+    def __init__(self, columns: List[str], file: IO):
+        self.columns = columns
+        self.file = file
+
+    def write_rows(self, rows: Iterable[List[Any]]) -> None:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        self.file.flush()
+
+
+class CsvWriter(RowWriter):
+    def __init__(self, columns: List[str], file: IO):
+        super().__init__(columns, file)
+        self._writer = csv.writer(file)
+        self._writer.writerow(columns)
+
+    def write_rows(self, rows: Iterable[List[Any]]) -> None:
+        self._writer.writerows(rows)
+
+
+class JsonLinesWriter(RowWriter):
+    def __init__(self, columns: List[str], file: IO, extra: Optional[dict] = None):
+        super().__init__(columns, file)
+        self.extra = extra or {}
+
+    def write_rows(self, rows: Iterable[List[Any]]) -> None:
+        for row in rows:
+            self.file.write(json.dumps({**self.extra, **dict(zip(self.columns, row))}, default=str) + "\n")
+
+
+class ParquetWriter(RowWriter):
+    # every call to write_rows is a row group of the file
+    def __init__(self, columns: List[str], file: IO):
+        super().__init__(columns, file)
+        pyarrow = _import_pyarrow()
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        self._writer = pyarrow.parquet.ParquetWriter(file, self._schema)
+
+    def write_rows(self, rows: Iterable[List[Any]]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        arrays = [
+            self._pyarrow.array([None if value is None else str(value) for value in values], self._pyarrow.string())
+            for values in zip(*rows)
+        ]
+        self._writer.write_table(self._pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+        super().close()
+
+
+class TableExporter:
+    # Exports one or several tables to a file, or to stdout for text formats.
+    # Several tables go to one file by table next to the given path, except in
+    # stdout where csv tables are separated by an empty line and json lines get
+    # the table name.
+
+    def __init__(self, output_format: str, path: Optional[str] = None):
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format}, use one of {', '.join(EXPORT_FORMATS)}")
+        if output_format == "parquet":
+            if not path:
+                raise ValueError("The parquet output needs a file, see --output-file")
+            _import_pyarrow()
+        self.output_format = output_format
+        self.path = path
+        self._files: List[IO] = []
+        self._writers: List[RowWriter] = []
+
+    def __enter__(self) -> "TableExporter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _open(self, table: Optional[str]) -> IO:
+        if not self.path:
+            return sys.stdout
+        path = self.path
+        if table:
+            stem, extension = os.path.splitext(self.path)
+            path = f"{stem}_{table}{extension}"
+        file = open(path, "wb") if self.output_format == "parquet" else open(path, "w", newline="")
+        self._files.append(file)
+        return file
+
+    def writer(self, columns: List[str], table: Optional[str] = None) -> RowWriter:
+        # table names the table when there are several of them
+        file = self._open(table)
+        if self.output_format == "csv":
+            if table and file is sys.stdout and self._writers:
+                file.write("\n")
+            writer: RowWriter = CsvWriter(columns, file)
+        elif self.output_format == "jsonl":
+            writer = JsonLinesWriter(columns, file, {"table": table} if table and file is sys.stdout else None)
+        else:
+            writer = ParquetWriter(columns, file)
+        self._writers.append(writer)
+        return writer
+
+    def close(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        for file in self._files:
+            file.close()
+        self._writers, self._files = [], []
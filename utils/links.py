@@ -0,0 +1,38 @@
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+
+class _LinkFound(Exception):
+    pass
+
+
+class FirstLinkParser(HTMLParser):
+    # Stops feeding the document as soon as the first <a href> is found,
+    # no tree is built.
+
+    link: Optional[str] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag != "a":
+            return
+        for name, value in attrs:
+            if name == "href" and value is not None:
+                self.link = value
+                raise _LinkFound
+
+
+def extract_link(html: Optional[str]) -> str:
+    if not html:
+        return ""
+    parser = FirstLinkParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except _LinkFound:
+        pass
+    return parser.link or ""
+
+
+def extract_links(htmls: List[Optional[str]]) -> List[str]:
+    # parsing stops at the first link, a process pool costs more than it saves
+    return [extract_link(html) for html in htmls]
@@ -1,5 +1,9 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import json
+import re
+
+
 NOT_OPERATOR = "!"
 OR_OPERATOR = "|"
 AND_OPERATOR = "&"
@@ -80,3 +84,152 @@ def combine(operator, unit, zero, domains):
 def AND(domains):
     """AND([D1,D2,...]) returns a domain representing D1 and D2 and ..."""
     return combine(AND_OPERATOR, [TRUE_LEAF], [FALSE_LEAF], domains)
+
+
+def OR(domains):
+    """OR([D1,D2,...]) returns a domain representing D1 or D2 or ..."""
+    return combine(OR_OPERATOR, [FALSE_LEAF], [TRUE_LEAF], domains)
+
+
+# --- Local evaluation -----------------------------------------------------------
+# Evaluates a domain on records as returned by search_read, to filter records
+# already fetched or cached without asking the server again.
+
+
+def _is_leaf(token):
+    return isinstance(token, (list, tuple)) and len(token) == 3
+
+
+def _leaf_value(value):
+    # many2one fields are read as [id, display_name] and compared on their id
+    if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[1], str):
+        return value[0]
+    return value
+
+
+def _is_false(value):
+    return value is False or value is None or value == []
+
+
+def _like(value, pattern, flags=0, anywhere=True):
+    if _is_false(value):
+        return False
+    # like on the server, % and _ are wildcards, =like and =ilike match the whole value
+    regex = ".*".join(".".join(re.escape(part) for part in chunk.split("_")) for chunk in str(pattern).split("%"))
+    match = re.search if anywhere else re.fullmatch
+    return match(regex, str(value), flags | re.DOTALL) is not None
+
+
+def ilike(value, pattern):
+    """Returns whether ``value`` matches ``pattern`` as with the ``ilike`` operator of a domain."""
+    return _like(value, pattern, re.IGNORECASE)
+
+
+def _in(value, values):
+    if isinstance(value, list):
+        # x2many fields match when any of their ids is in values
+        return bool(set(value) & set(values))
+    return value in values or (_is_false(value) and False in values)
+
+
+def _equals(value, arg):
+    return _is_false(value) if arg is False else value == arg
+
+
+LOCAL_OPERATORS = {
+    "=": _equals,
+    "!=": lambda value, arg: not _equals(value, arg),
+    "in": _in,
+    "not in": lambda value, arg: not _in(value, arg),
+    "ilike": ilike,
+    "not ilike": lambda value, arg: not ilike(value, arg),
+    "like": _like,
+    "not like": lambda value, arg: not _like(value, arg),
+    "=like": lambda value, arg: _like(value, arg, anywhere=False),
+    "=ilike": lambda value, arg: _like(value, arg, re.IGNORECASE, anywhere=False),
+    ">": lambda value, arg: not _is_false(value) and value > arg,
+    ">=": lambda value, arg: not _is_false(value) and value >= arg,
+    "<": lambda value, arg: not _is_false(value) and value < arg,
+    "<=": lambda value, arg: not _is_false(value) and value <= arg,
+}
+
+
+def _evaluate_leaf(leaf, record):
+    field, operator, arg = leaf
+    if field in (0, 1):
+        # TRUE_LEAF and FALSE_LEAF
+        return field == arg
+    if operator not in LOCAL_OPERATORS:
+        raise ValueError(f"Operator {operator} can not be evaluated locally")
+    if field not in record:
+        raise ValueError(f"Field {field} is not in the record, it can not be evaluated locally")
+    return LOCAL_OPERATORS[operator](_leaf_value(record[field]), arg)
+
+
+def evaluate_domain(domain, record):
+    """Returns whether ``record``, a dict as read by search_read, matches ``domain``."""
+    stack = []
+    for token in reversed(normalize_domain(domain)):
+        if token == NOT_OPERATOR:
+            stack.append(not stack.pop())
+        elif token in (AND_OPERATOR, OR_OPERATOR):
+            first, second = stack.pop(), stack.pop()
+            stack.append(first and second if token == AND_OPERATOR else first or second)
+        else:
+            stack.append(_evaluate_leaf(token, record))
+    return stack.pop()
+
+
+def filter_records(domain, records):
+    """Returns the ``records`` matching ``domain``, in the same order."""
+    return [record for record in records if evaluate_domain(domain, record)]
+
+
+def _expression_end(domain, start):
+    # index right after the expression starting at ``start`` of a normalized domain
+    arity = {NOT_OPERATOR: 1, AND_OPERATOR: 2, OR_OPERATOR: 2}
+    expected, index = 1, start
+    while expected:
+        token = domain[index]
+        expected += -1 if _is_leaf(token) else arity[token] - 1
+        index += 1
+    return index
+
+
+def canonical_domain(domain):
+    """Returns ``domain`` normalized, with its top level conditions deduplicated and
+    sorted, so that the same conditions ANDed in any order give the same domain.
+    The domain selecting everything is ``[]``.
+    """
+    conjuncts = {
+        json.dumps(conjunct, default=str): conjunct
+        for conjunct in _conjuncts(normalize_domain(domain))
+        if conjunct != TRUE_DOMAIN
+    }
+    return AND([conjuncts[key] for key in sorted(conjuncts)]) if conjuncts else []
+
+
+def _conjuncts(domain):
+    # the sub-domains ANDed at the top of a normalized domain
+    if domain and domain[0] == AND_OPERATOR:
+        middle = _expression_end(domain, 1)
+        return _conjuncts(domain[1:middle]) + _conjuncts(domain[middle:])
+    return [domain]
+
+
+def domain_fields(domain):
+    """Returns the set of fields used by the leaves of ``domain``."""
+    return {token[0] for token in normalize_domain(domain) if _is_leaf(token) and token[0] not in (0, 1)}
+
+
+def partition_domain(domain, local_fields):
+    """Splits ``domain`` in a ``(remote, local)`` couple of domains, ANDed they
+    give the same records. The local one gathers the top level conditions that
+    only use ``local_fields`` and operators evaluated by ``evaluate_domain``.
+    """
+    remote, local = [], []
+    for conjunct in _conjuncts(normalize_domain(domain)):
+        leaves = [token for token in conjunct if _is_leaf(token)]
+        is_local = all(leaf[0] in local_fields and leaf[1] in LOCAL_OPERATORS for leaf in leaves)
+        (local if leaves and is_local else remote).append(conjunct)
+    return AND(remote), AND(local)
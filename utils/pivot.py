@@ -0,0 +1,63 @@
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+def _hashable(value: Any) -> Hashable:
+    # many2one values come as [id, name]
+    return tuple(value) if isinstance(value, list) else value
+
+
+class Pivot:
+    # Counts grouped on several dimensions at once (read_group with lazy=False),
+    # every marginal table or cross-tab is derived from it without new queries.
+
+    dimensions: List[str]
+    groups: List[dict]
+
+    def __init__(self, groups: List[dict], dimensions: List[str]):
+        self.groups = groups
+        self.dimensions = dimensions
+
+    def _check_dimension(self, dimension: str) -> None:
+        if dimension not in self.dimensions:
+            raise ValueError(f"{dimension} is not a dimension of the pivot")
+
+    def marginal(self, dimension: str, union_wrapper: Optional[Callable] = None) -> List[dict]:
+        self._check_dimension(dimension)
+        counts: Dict[Hashable, int] = defaultdict(int)
+        values: Dict[Hashable, Any] = {}
+        for group in self.groups:
+            key = _hashable(group.get(dimension))
+            values.setdefault(key, group.get(dimension))
+            counts[key] += group.get("__count", 0)
+        rows = [{dimension: values[key], "__count": count} for key, count in counts.items()]
+        return rows if not callable(union_wrapper) else union_wrapper(rows)
+
+    def crosstab(
+        self,
+        row_dimension: str,
+        column_dimension: str,
+        column_key: Callable[[Any], Hashable] = _hashable,
+    ) -> Tuple[List[Hashable], List[List[Any]]]:
+        self._check_dimension(row_dimension)
+        self._check_dimension(column_dimension)
+        table: Dict[Hashable, Dict[Hashable, int]] = defaultdict(lambda: defaultdict(int))
+        columns: List[Hashable] = []
+        for group in self.groups:
+            column = column_key(group.get(column_dimension))
+            if column not in columns:
+                columns.append(column)
+            table[_hashable(group.get(row_dimension))][column] += group.get("__count", 0)
+        rows = [
+            [row, *[cells.get(column, 0) for column in columns], sum(cells.values())]
+            for row, cells in sorted(table.items(), key=lambda item: str(item[0]))
+        ]
+        return columns, rows
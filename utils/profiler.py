@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+def _domain_size(domain: List[Any]) -> int:
+    # leaves and values of list operands, e.g. 200 for a chunk of ids
+    return sum(
+        len(leaf[2]) if isinstance(leaf[2], (list, tuple)) else 1
+        for leaf in domain
+        if isinstance(leaf, (list, tuple)) and len(leaf) == 3
+    )
+
+
+def _rows(result: Any) -> int:
+    return len(result) if isinstance(result, list) else 1
+
+
+class Profiler:
+    # Timings of the stages of a run and of every RPC call made by the services,
+    # recorded from several threads at once.
+
+    stages: List[Dict[str, Any]]
+    calls: List[Dict[str, Any]]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.stages = []
+        self.calls = []
+
+    def _offset(self, start: float) -> float:
+        return round(start - self._start, 6)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.stages.append({"stage": name, "start": self._offset(start), "duration": round(duration, 6)})
+
+    def call(self, model: str, method: str, domain: List[Any], func: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = func()
+        latency = time.perf_counter() - start
+        call = {
+            "model": model,
+            "method": method,
+            "start": self._offset(start),
+            "latency": round(latency, 6),
+            "domain_size": _domain_size(domain),
+            "rows": _rows(result),
+            "bytes": len(json.dumps(result, default=str)),
+        }
+        with self._lock:
+            self.calls.append(call)
+        return result
+
+    def stage_rows(self) -> List[Tuple[str, float, float]]:
+        # (stage, start, duration) in the order the stages started
+        stages = sorted(self.stages, key=lambda stage: stage["start"])
+        return [(stage["stage"], stage["start"], stage["duration"]) for stage in stages]
+
+    def call_rows(self) -> List[Tuple[str, str, int, float, float, int, int, int]]:
+        # (model, method, calls, total latency, max latency, domain size, rows, bytes)
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        for call in self.calls:
+            groups[(call["model"], call["method"])].append(call)
+        return [
+            (
+                model,
+                method,
+                len(calls),
+                sum(call["latency"] for call in calls),
+                max(call["latency"] for call in calls),
+                sum(call["domain_size"] for call in calls),
+                sum(call["rows"] for call in calls),
+                sum(call["bytes"] for call in calls),
+            )
+            for (model, method), calls in groups.items()
+        ]
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, "a") as file:
+            for stage in self.stages:
+                file.write(json.dumps({"type": "stage", **stage}) + "\n")
+            for call in self.calls:
+                file.write(json.dumps({"type": "call", **call}) + "\n")
+
+
+def profile_stage(profiler: Optional[Profiler], name: str) -> ContextManager[None]:
+    return profiler.stage(name) if profiler is not None else nullcontext()
@@ -0,0 +1,112 @@
+from array import array
+from math import isnan
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+# typecode of array backed columns, None keeps a plain list (strings, mixed values)
+Getter = Tuple[Optional[str], Callable[[Any], Any]]
+
+MISSING = -1
+
+_ARRAY_DEFAULTS = {"b": 0, "q": 0, "d": float("nan")}
+
+
+class RecordBatch:
+    # Column oriented set of records: every column has the same length and
+    # operations work on whole columns instead of one object at a time.
+
+    __slots__ = ("columns", "length")
+
+    columns: Dict[str, MutableSequence]
+    length: int
+
+    def __init__(self, columns: Dict[str, MutableSequence], length: Optional[int] = None):
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns of a batch must have the same length")
+        self.columns = columns
+        self.length = lengths.pop() if lengths else length or 0
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any], getters: Dict[str, Getter]) -> "RecordBatch":
+        columns: Dict[str, MutableSequence] = {}
+        for name, (typecode, getter) in getters.items():
+            values = [getter(record) for record in records]
+            columns[name] = array(typecode, values) if typecode else values
+        return cls(columns, len(records))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, name: str) -> MutableSequence:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def _new_column(self, column: MutableSequence, values: Iterable[Any]) -> MutableSequence:
+        return array(column.typecode, values) if isinstance(column, array) else list(values)
+
+    def take(self, indices: Sequence[int]) -> "RecordBatch":
+        columns = {
+            name: self._new_column(column, (column[index] for index in indices))
+            for name, column in self.columns.items()
+        }
+        return RecordBatch(columns, len(indices))
+
+    def filter(self, mask: Sequence[bool]) -> "RecordBatch":
+        return self.take([index for index, keep in enumerate(mask) if keep])
+
+    def argsort(self, name: str, reverse: bool = False) -> List[int]:
+        # NaN (missing float) values always come first, like -inf
+        column = self.columns[name]
+
+        def key(index: int) -> Any:
+            value = column[index]
+            return float("-inf") if isinstance(value, float) and isnan(value) else value
+
+        return sorted(range(self.length), key=key, reverse=reverse)
+
+    def sort(self, name: str, reverse: bool = False) -> "RecordBatch":
+        return self.take(self.argsort(name, reverse))
+
+    def lookup(self, left_on: str, other: "RecordBatch", right_on: str) -> array:
+        # hash join: for each record, the index of the matching one in other or MISSING
+        index: Dict[Hashable, int] = {key: position for position, key in enumerate(other[right_on])}
+        return array("q", (index.get(key, MISSING) for key in self.columns[left_on]))
+
+    def gather(
+        self,
+        other: "RecordBatch",
+        positions: Sequence[int],
+        names: Dict[str, str],
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> "RecordBatch":
+        # add columns of other (renamed from names keys to values), taken at positions
+        defaults = defaults or {}
+        columns = dict(self.columns)
+        for source, target in names.items():
+            column = other[source]
+            default = defaults.get(source, _ARRAY_DEFAULTS.get(getattr(column, "typecode", None)))
+            columns[target] = self._new_column(
+                column, (column[position] if position != MISSING else default for position in positions)
+            )
+        return RecordBatch(columns, self.length)
+
+    def with_column(self, name: str, column: MutableSequence) -> "RecordBatch":
+        return RecordBatch({**self.columns, name: column}, self.length)
+
+    def rows(self, names: List[str]) -> Iterator[Tuple[Any, ...]]:
+        return zip(*(self.columns[name] for name in names))
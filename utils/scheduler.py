@@ -0,0 +1,83 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+from typing_extensions import Self
+
+from odev.plugins.odev_rolling_release.utils.profiler import Profiler, profile_stage
+
+
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    depends: List[str]
+
+    def __init__(self, name: str, func: Callable[..., Any], depends: Optional[List[str]] = None):
+        self.name = name
+        self.func = func
+        self.depends = depends or []
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name}, {self.depends})"
+
+
+class StageScheduler:
+    # Runs stages as soon as all their dependencies are done, the result of each
+    # dependency is given to the stage callable as a keyword argument named like it.
+
+    max_workers: int
+    stages: Dict[str, Stage]
+    profiler: Optional[Profiler]
+
+    def __init__(self, max_workers: int = 4, profiler: Optional[Profiler] = None):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.profiler = profiler
+
+    def add_stage(self, name: str, func: Callable[..., Any], depends: Optional[List[str]] = None) -> Self:
+        if name in self.stages:
+            raise ValueError(f"Stage {name} already defined")
+        self.stages[name] = Stage(name, func, depends)
+        return self
+
+    def _check_stages(self) -> None:
+        for stage in self.stages.values():
+            missing = [depend for depend in stage.depends if depend not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(missing)}")
+
+    def _ready_stages(self, done: Dict[str, Any], running: Dict[Future, str]) -> List[Stage]:
+        started = set(done) | set(running.values())
+        return [
+            stage
+            for stage in self.stages.values()
+            if stage.name not in started and all(depend in done for depend in stage.depends)
+        ]
+
+    def _run_stage(self, stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        with profile_stage(self.profiler, stage.name):
+            return stage.func(**kwargs)
+
+    def run(self) -> Dict[str, Any]:
+        self._check_stages()
+        results: Dict[str, Any] = {}
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(results) < len(self.stages):
+                for stage in self._ready_stages(results, running):
+                    kwargs = {depend: results[depend] for depend in stage.depends}
+                    running[executor.submit(self._run_stage, stage, kwargs)] = stage.name
+                if not running:
+                    pending = [name for name in self.stages if name not in results]
+                    raise ValueError(f"Circular dependency between stages: {', '.join(pending)}")
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    # re-raise the stage exception in the caller thread
+                    results[name] = future.result()
+        return results
@@ -1,6 +1,7 @@
 from collections import defaultdict
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Callable, List
+from typing import Any, Callable, List, Optional
 
 
 class TripleFlag(Enum):
@@ -12,6 +13,18 @@ class TripleFlag(Enum):
         return self.value
 
 
+class DaysAgo(str):
+    # The date some days before today, sent as is in domains. Cache keys use the number
+    # of days instead, so that the same query keeps its key from a day to the next.
+
+    days: int
+
+    def __new__(cls, days: int) -> "DaysAgo":
+        value = super().__new__(cls, (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"))
+        value.days = days
+        return value
+
+
 class BoolStr:
     def __init__(self, value: Any, value_if_true=False):
         self.value, self.value_if_true = value, value_if_true
@@ -40,3 +53,10 @@ def group_by_record_exists(datalist: List[dict], key: str) -> List[dict]:
         item[key] = yes_or_no_value(bool(item[key]))
         result[item[key]] += item["__count"]
     return [{key: k, "__count": v} for k, v in result.items()]
+
+
+def many2one_id(value: Any) -> Optional[int]:
+    # many2one values are [id, name] when read with the default load
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value or None